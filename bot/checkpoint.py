@@ -0,0 +1,71 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from util.config import LOG_CHECKPOINT_FILE
+
+# Počet bajtů ze začátku souboru, podle kterých se pozná rotace logu
+FINGERPRINT_BYTES = 1024
+
+def fingerprint(header):
+    """Otisk začátku souboru"""
+    return hashlib.sha1(header[:FINGERPRINT_BYTES]).hexdigest()
+
+class CheckpointStore:
+    """
+    Trvalé pozice čtení logů (offset, velikost, mtime a otisk začátku souboru).
+    Ukládá se atomicky přes dočasný soubor a os.replace, takže pád bota nenechá poloviční JSON.
+    """
+    def __init__(self, path=LOG_CHECKPOINT_FILE):
+        self.path = path
+        self.checkpoints = self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading log checkpoints: {e}")
+        return {}
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.checkpoints, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving log checkpoints: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def get(self, filepath):
+        return self.checkpoints.get(filepath)
+
+    def set(self, filepath, offset, size, mtime, header):
+        self.checkpoints[filepath] = {
+            "offset": offset,
+            "size": size,
+            "mtime": mtime,
+            "fingerprint": fingerprint(header),
+            "fingerprint_length": min(len(header), FINGERPRINT_BYTES)
+        }
+        self.save()
+
+    def clear(self, filepath):
+        if self.checkpoints.pop(filepath, None) is not None:
+            self.save()
+
+def is_same_file(checkpoint, header):
+    """Porovná otisk uložený v checkpointu se začátkem aktuálního souboru"""
+    length = checkpoint.get("fingerprint_length", FINGERPRINT_BYTES)
+    if len(header) < length:
+        return False
+    return fingerprint(header[:length]) == checkpoint.get("fingerprint")
@@ -22,6 +22,37 @@ FTP_USER = os.getenv("FTP_USER", "user")
 FTP_PASS = os.getenv("FTP_PASS", "password")
 FILE_PATH = os.getenv("FILE_PATH", "/TheIsle/Saved/Logs/TheIsle-Shipping.log")
 ADMIN_FILE_PATH = os.getenv("ADMIN_FILE_PATH", "/TheIsle/Saved/Config/LinuxServer/Game.ini")
+SFTP_KEEPALIVE = int(os.getenv("SFTP_KEEPALIVE", 30))
+SFTP_WINDOW_SIZE = int(os.getenv("SFTP_WINDOW_SIZE", 4 * 1024 * 1024))
+SFTP_BACKOFF_MAX = int(os.getenv("SFTP_BACKOFF_MAX", 300))
+LOG_CHECKPOINT_FILE = os.getenv("LOG_CHECKPOINT_FILE", "log_checkpoints.json")
+LOG_COLD_START = os.getenv("LOG_COLD_START", "tail").lower()
+LOG_BACKFILL_BYTES = int(os.getenv("LOG_BACKFILL_BYTES", 1024 * 1024))
+LOG_BACKFILL_MINUTES = int(os.getenv("LOG_BACKFILL_MINUTES", 30))
+LOG_READ_CHUNK = int(os.getenv("LOG_READ_CHUNK", 1024 * 1024))
+LOG_DISPATCH_BATCH = int(os.getenv("LOG_DISPATCH_BATCH", 500))
+LOG_POLL_MIN = float(os.getenv("LOG_POLL_MIN", 3))
+LOG_POLL_MAX = float(os.getenv("LOG_POLL_MAX", 60))
+LOG_POLL_DECAY = float(os.getenv("LOG_POLL_DECAY", 1.5))
+OUTPUT_LINGER = float(os.getenv("OUTPUT_LINGER", 1))
+OUTPUT_DIGEST_THRESHOLD = int(os.getenv("OUTPUT_DIGEST_THRESHOLD", 30))
+KILL_DEDUP_WINDOW = int(os.getenv("KILL_DEDUP_WINDOW", 6 * 60 * 60))
+KILLFEED_DB = os.getenv("KILLFEED_DB", "killfeed.db")
+KILL_STATS_EXPORT_JSON = os.getenv("KILL_STATS_EXPORT_JSON", "true").lower() in ["true", "1", "yes"]
+LIVE_EMBED_FILE = os.getenv("LIVE_EMBED_FILE", "live_embeds.json")
+LIVE_EMBED_DEBOUNCE = float(os.getenv("LIVE_EMBED_DEBOUNCE", 5))
+PLAYTIME_DB = os.getenv("PLAYTIME_DB", "playtime.db")
+PLAYTIME_SESSION_GAP = int(os.getenv("PLAYTIME_SESSION_GAP", 15 * 60))
+RCON_SNAPSHOT_INTERVAL = int(os.getenv("RCON_SNAPSHOT_INTERVAL", 30))
+RCON_TIMEOUT = float(os.getenv("RCON_TIMEOUT", 10))
+RCON_QUIET_GAP = float(os.getenv("RCON_QUIET_GAP", 0.15))
+RCON_BACKOFF_MAX = int(os.getenv("RCON_BACKOFF_MAX", 300))
+RCON_CONNECTIONS = int(os.getenv("RCON_CONNECTIONS", 2))
+MAP_RENDER_WORKERS = int(os.getenv("MAP_RENDER_WORKERS", 2))
+MAP_RENDER_CONCURRENCY = int(os.getenv("MAP_RENDER_CONCURRENCY", 2))
+MAP_RENDER_CACHE_BYTES = int(os.getenv("MAP_RENDER_CACHE_BYTES", 64 * 1024 * 1024))
+MAP_TILE_HOST = os.getenv("MAP_TILE_HOST", "127.0.0.1")
+MAP_TILE_PORT = int(os.getenv("MAP_TILE_PORT", 8765))
 ENABLE_INJECTIONS = os.getenv('ENABLE_INJECTIONS', 'false').lower() in ['true', '1', 'yes']
 
 PTERO_ENABLE = os.getenv('PTERO_ENABLE', 'false').lower() in ['true', '1', 'yes']
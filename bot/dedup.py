@@ -0,0 +1,121 @@
+import calendar
+import heapq
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+
+LOG_TIMESTAMP_FORMAT = "%Y.%m.%d-%H.%M.%S"
+
+def log_time(timestamp):
+    """Čas události z logu ('2024.05.01-12.30.00' případně s ':ms') v sekundách"""
+    return calendar.timegm(datetime.strptime(timestamp[:19], LOG_TIMESTAMP_FORMAT).timetuple())
+
+class DedupWindow:
+    """
+    Deduplikace událostí v klouzavém časovém okně.
+    Klíče se drží po sekundách času události; vše starší než watermark (nejnovější čas) minus okno
+    se zahodí a událost z té doby se rovnou bere jako zpracovaná. Paměť i velikost souboru tak
+    závisí jen na počtu událostí v okně, ne na počtu všech kdy zpracovaných.
+    """
+    def __init__(self, path, window):
+        self.path = path
+        self.window = window
+        self.watermark = None
+        self.buckets = {}
+        self.bucket_times = []
+        self.load()
+
+    @property
+    def low_watermark(self):
+        return None if self.watermark is None else self.watermark - self.window
+
+    def __len__(self):
+        return sum(len(keys) for keys in self.buckets.values())
+
+    def _insert(self, event_time, key):
+        keys = self.buckets.get(event_time)
+        if keys is None:
+            keys = self.buckets[event_time] = set()
+            heapq.heappush(self.bucket_times, event_time)
+        keys.add(key)
+
+    def _expire(self):
+        low = self.low_watermark
+        while self.bucket_times and self.bucket_times[0] < low:
+            del self.buckets[heapq.heappop(self.bucket_times)]
+
+    def contains(self, timestamp, key):
+        """Jako seen, ale nic nezaznamená (pro kontrolu před zápisem, který může selhat)"""
+        event_time = log_time(timestamp)
+        if self.watermark is not None and event_time < self.low_watermark:
+            return True
+        return key in self.buckets.get(event_time, ())
+
+    def seen(self, timestamp, key):
+        """Vrátí True pro už zpracovanou událost, jinak ji zaznamená a vrátí False"""
+        event_time = log_time(timestamp)
+        if self.watermark is not None and event_time < self.low_watermark:
+            return True
+        if key in self.buckets.get(event_time, ()):
+            return True
+        self._insert(event_time, key)
+        if self.watermark is None or event_time > self.watermark:
+            self.watermark = event_time
+            self._expire()
+        return False
+
+    def clear(self):
+        self.watermark = None
+        self.buckets = {}
+        self.bucket_times = []
+        self.save()
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                # Starý formát processed_kills.json: seznam "timestamp_killer_victim"
+                for kill_id in data:
+                    timestamp, _, key = kill_id.partition("_")
+                    try:
+                        event_time = log_time(timestamp)
+                    except ValueError:
+                        continue
+                    self._insert(event_time, key)
+                    self.watermark = max(self.watermark or event_time, event_time)
+                logging.info(f"Migrated {len(data)} processed kill IDs from the old format")
+            else:
+                self.watermark = data.get("watermark")
+                for event_time, keys in data.get("buckets", {}).items():
+                    for key in keys:
+                        self._insert(int(event_time), key)
+            if self.watermark is not None:
+                self._expire()
+        except Exception as e:
+            logging.error(f"Error loading dedup window {self.path}: {e}")
+            self.watermark = None
+            self.buckets = {}
+            self.bucket_times = []
+
+    def save(self):
+        data = {
+            "watermark": self.watermark,
+            "buckets": {str(event_time): sorted(keys) for event_time, keys in self.buckets.items()}
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".dedup-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving dedup window {self.path}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -1,17 +1,20 @@
 import nextcord
 from nextcord.ext import commands, tasks
-import paramiko
-import os
-import re
 import asyncio
 import logging
 import json
 from datetime import datetime
-from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
-from util.config import FTP_HOST, FTP_PASS, FTP_PORT, FTP_USER
-from util.config import ENABLE_LOGGING, KILLFEED_CHANNEL, FILE_PATH
-from util.config import STATS_CHANNEL, DEFAULT_GUILDS
+from util.config import ENABLE_LOGGING
+from util.config import STATS_CHANNEL, DEFAULT_GUILDS, KILL_DEDUP_WINDOW, KILL_STATS_EXPORT_JSON
+from util.dedup import DedupWindow
+from util.killstore import KillStore
+from util.leaderboard import Leaderboard
+from util.logtail import get_log_tail
+from util.liveembed import get_live_embeds
+from util.playerindex import get_player_index
+
+# Kolik nezapsaných killů se drží pro další pokus, když zápis do databáze selhává
+KILL_RETRY_LIMIT = 1000
 
 class KillStats(commands.Cog):
     """
@@ -20,232 +23,154 @@ class KillStats(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
-        self.ftp_host = FTP_HOST
-        self.ftp_port = FTP_PORT
-        self.ftp_username = FTP_USER
-        self.ftp_password = FTP_PASS
-        self.filepath = FILE_PATH
         self.stats_channel_id = STATS_CHANNEL
-        self.last_position = None
-        self.last_stat = None
-        # Používáme defaultdict pro kill_stats, abychom nemuseli kontrolovat existenci klíčů
-        self.kill_stats = defaultdict(lambda: {"kills": 0, "deaths": 0, "player_name": "", "dinos": defaultdict(int)})
-        self.stats_message = None
+        # Statistiky žijí v killfeed.db (tabulka player_stats), kill_stats.json je jen export pro web
+        self.store = KillStore()
+        # Pořadí podle killů udržované průběžně, dotazy na top/pořadí bez řazení všech hráčů
+        self.leaderboard = Leaderboard()
+        # Sdílený index jmen pro /kills a našeptávání
+        self.player_index = get_player_index(bot)
         self.stats_file = "kill_stats.json"
-        self.processed_kills = set()  # Set pro sledování již zpracovaných killů
+        self.stats_import = None
         self.processed_kills_file = "processed_kills.json"  # Soubor pro uložení zpracovaných kill ID
-        
-        # Načtení statistik a zpracovaných killů ze souborů pokud existují
-        self.load_stats()
-        self.load_processed_kills()
-        self.update_stats_message.start()
+        # Zpracované killy jen za posledních KILL_DEDUP_WINDOW sekund času v logu
+        self.processed_kills = DedupWindow(self.processed_kills_file, KILL_DEDUP_WINDOW)
+        # Killy, jejichž zápis selhal; LogTail už je znovu nepošle, zkusí se s další dávkou
+        self.retry_kills = []
+        # Zpráva s žebříčkem se edituje jen při změně obsahu, přes sdílený LiveEmbeds
+        self.live_embeds = get_live_embeds(bot)
+        self.live_embeds.register("kill_stats", self.stats_channel_id, self.create_stats_embed, adopt_title="Top 10 Killers")
         self.save_stats_periodic.start()
-        self.check_kill_feed.start()
+        self.log_tail = get_log_tail(bot)
+        self.log_tail.subscribe("LogTheIsleKillData", self.check_kill_feed)
 
-    def load_stats(self):
-        """Načte statistiky ze souboru"""
+    async def load_stats(self):
+        """Při prvním spuštění převede starý kill_stats.json do databáze a naplní žebříček (jen jednou)"""
+        if self.stats_import is None:
+            self.stats_import = asyncio.ensure_future(self.import_stats())
+        await asyncio.shield(self.stats_import)
+
+    async def import_stats(self):
         try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, 'r') as f:
-                    data = json.load(f)
-                    for player_id, stats in data.items():
-                        # Ujisti se, že struktura je správná a obsahuje všechny potřebné klíče
-                        player_stats = {
-                            "kills": stats.get("kills", 0),
-                            "deaths": stats.get("deaths", 0),
-                            "player_name": stats.get("player_name", ""),
-                            "dinos": defaultdict(int)
-                        }
-                        
-                        # Načti statistiky dinů
-                        if "dinos" in stats:
-                            for dino, count in stats["dinos"].items():
-                                player_stats["dinos"][dino] = count
-                        
-                        self.kill_stats[player_id] = player_stats
-                logging.info(f"Statistiky načteny ze souboru {self.stats_file}")
-                
-                # Debugovací výpis pro kontrolu
-                for player_id, stats in self.kill_stats.items():
-                    if stats["deaths"] > 0:
-                        logging.info(f"Načteno: Hráč {stats['player_name']} (ID: {player_id}) má {stats['deaths']} úmrtí")
+            if await self.store.import_json(self.stats_file):
+                logging.info(f"Statistiky převedeny ze souboru {self.stats_file} do databáze")
         except Exception as e:
-            logging.error(f"Chyba při načítání statistik: {e}")
-            
-    def load_processed_kills(self):
-        """Načte seznam již zpracovaných killů ze souboru"""
+            logging.error(f"Chyba při převodu statistik do databáze: {e}")
+        try:
+            for player_id, kills in await self.store.kill_counts():
+                self.leaderboard.update(player_id, kills)
+            logging.info(f"Žebříček zabijáků načten ({len(self.leaderboard)} hráčů)")
+        except Exception as e:
+            logging.error(f"Chyba při načítání žebříčku: {e}")
         try:
-            if os.path.exists(self.processed_kills_file):
-                with open(self.processed_kills_file, 'r') as f:
-                    self.processed_kills = set(json.load(f))
-                logging.info(f"Seznam zpracovaných killů načten ze souboru {self.processed_kills_file}")
+            self.player_index.add_many(await self.store.player_names())
         except Exception as e:
-            logging.error(f"Chyba při načítání seznamu zpracovaných killů: {e}")
-            self.processed_kills = set()
+            logging.error(f"Chyba při načítání jmen hráčů do indexu: {e}")
 
     def save_processed_kills(self):
         """Uloží seznam zpracovaných killů do souboru"""
         try:
-            with open(self.processed_kills_file, 'w') as f:
-                json.dump(list(self.processed_kills), f)
+            self.processed_kills.save()
             logging.info(f"Seznam zpracovaných killů uložen do souboru {self.processed_kills_file}")
         except Exception as e:
             logging.error(f"Chyba při ukládání seznamu zpracovaných killů: {e}")
 
-    def save_stats(self):
-        """Uloží statistiky do souboru"""
+    async def export_stats(self):
+        """Zapíše kill_stats.json z databáze pro webovou aplikaci (KILL_STATS_EXPORT_JSON)"""
         try:
+            stats = await self.store.all_stats()
             with open(self.stats_file, 'w') as f:
-                json.dump(self.kill_stats, f, indent=4)
-            logging.info(f"Statistiky uloženy do souboru {self.stats_file}")
-            
-            # Také uložíme zpracované killy při každém ukládání statistik
-            self.save_processed_kills()
+                json.dump(stats, f)
+            logging.info(f"Statistiky exportovány do souboru {self.stats_file}")
         except Exception as e:
-            logging.error(f"Chyba při ukládání statistik: {e}")
+            logging.error(f"Chyba při exportu statistik: {e}")
 
     @tasks.loop(minutes=10)
     async def save_stats_periodic(self):
-        """Periodicky ukládá statistiky a zpracované killy do souborů"""
-        self.save_stats()
+        """Periodicky ukládá zpracované killy (statistiky se zapisují průběžně do databáze)"""
         self.save_processed_kills()
+        if KILL_STATS_EXPORT_JSON:
+            await self.export_stats()
 
-    async def async_sftp_operation(self, operation, *args, **kwargs):
-        """Provede SFTP operaci asynchronně"""
-        loop = asyncio.get_event_loop()
-        try:
-            with paramiko.Transport((self.ftp_host, self.ftp_port)) as transport:
-                transport.connect(username=self.ftp_username, password=self.ftp_password)
-                sftp = paramiko.SFTPClient.from_transport(transport)
-                try:
-                    result = await loop.run_in_executor(None, operation, sftp, *args, **kwargs)
-                    return result
-                finally:
-                    sftp.close()
-        except Exception as e:
-            logging.error(f"SFTP operation error: {e}")
-            return None
+    @save_stats_periodic.before_loop
+    async def before_save_stats_periodic(self):
+        await self.load_stats()
 
-    def read_file(self, sftp, filepath, last_position):
-        """Přečte nový obsah souboru od poslední pozice"""
-        current_stat = sftp.stat(filepath)
-        if last_position is None or (self.last_stat is not None and current_stat.st_size < last_position):
-            last_position = 0
-        self.last_stat = current_stat
-        with sftp.file(filepath, "r") as file:
-            file.seek(last_position)
-            file_content = file.read().decode()
-            new_position = file.tell()
-        return file_content, new_position
+    def kill_key(self, event):
+        return f"{event.killer_id}_{event.victim_id or ''}"
 
-    def parse_kill_feed(self, file_content):
-        """Parsuje obsah kill feedu a aktualizuje statistiky"""
-        # Jednodušší regulární výraz pro lepší čitelnost a údržbu
-        timestamp_pattern = r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2})\]'
-        kill_header = r'\[LogTheIsleKillData\]:'
-        killer_pattern = r'(.*?)\s+\[(\d+)\]\s+Dino:\s+(.*?),\s+(Male|Female),\s+([\d\.]+)'
-        natural_death = r'Died from Natural cause'
-        victim_pattern = r'Killed\s+the\s+following\s+player:\s+(.*?),\s+\[(\d+)\],\s+Dino:\s+(.*?),\s+Gender:\s+(Male|Female),\s+Growth:\s+([\d\.]+)'
-        
-        # Hledáme řádky s killem
-        kill_regex = re.compile(f"^{timestamp_pattern}{kill_header}\\s+{killer_pattern}\\s+-\\s+(?:{natural_death}|{victim_pattern}).*$")
-        
-        matches = kill_regex.findall(file_content)
-        updated = False
-        
-        for match in matches:
-            timestamp = match[0]
-            killer = match[1]
-            killer_id = match[2]
-            killer_dino = match[3]
-            killer_gender = match[4]
-            killer_value = match[5]
-            
-            # Kontrola, zda jde o přirozenou smrt nebo zabití
-            if len(match) > 6:  # Pokud máme více než 6 skupin, jde o zabití (ne přirozenou smrt)
-                victim = match[6]
-                victim_id = match[7]
-                victim_dino = match[8]
-                victim_gender = match[9]
-                victim_growth = match[10]
-                natural = False
-            else:
-                victim = ""
-                victim_id = ""
-                victim_dino = ""
-                victim_gender = ""
-                victim_growth = ""
-                natural = True
-            
-            # Vytvoření unikátního ID pro tento kill
-            kill_id = f"{timestamp}_{killer_id}_{victim_id}"
-            
-            # Kontrola, zda tento kill už byl zpracován dříve
-            if kill_id in self.processed_kills:
-                continue  # Přeskoč, protože tento kill už byl zpracován
-            
-            # Přidání do setu zpracovaných killů
-            self.processed_kills.add(kill_id)
-            
-            # Aktualizace jména hráče pro ID
-            if killer:
-                self.kill_stats[killer_id]["player_name"] = killer
-            
-            if victim:
-                self.kill_stats[victim_id]["player_name"] = victim
-            
-            # Pokud nejde o přirozenou smrt, aktualizuj zabití a smrti
-            if not natural and victim and victim_id:
-                self.kill_stats[killer_id]["kills"] += 1
-                self.kill_stats[killer_id]["dinos"][killer_dino] += 1
-                
-                # Ujisti se, že victim_id je platné a přidej smrt oběti
-                if victim_id.isdigit():
-                    self.kill_stats[victim_id]["deaths"] += 1
-                    logging.info(f"Přičtena smrt hráči {victim} (ID: {victim_id}), nová hodnota: {self.kill_stats[victim_id]['deaths']}")
-                
-                updated = True
-                logging.info(f"Zaznamenaná smrt: {killer} ({killer_dino}) zabil {victim} ({victim_dino})")
-        
-        return updated
+    def process_kill_event(self, event):
+        """Vrátí True pro nový kill, který se má zapsat do databáze"""
+        # Jen kontrola; jako zpracovaný se kill zaznamená až po úspěšném zápisu do databáze
+        if self.processed_kills.contains(event.timestamp, self.kill_key(event)):
+            return False
+        if not event.natural and event.victim_id:
+            logging.info(f"Zaznamenaná smrt: {event.killer} ({event.killer_dino}) zabil {event.victim} ({event.victim_dino})")
+        return True
 
-    @tasks.loop(seconds=30)
-    async def check_kill_feed(self):
-        """Kontroluje nové záznamy v kill feedu a aktualizuje statistiky"""
+    async def check_kill_feed(self, kill_events):
+        """Zpracuje nové KillEvent ze sdíleného LogTail a aktualizuje statistiky"""
         try:
-            result = await self.async_sftp_operation(self.read_file, self.filepath, self.last_position)
-            if result is None:
-                return
-                
-            file_content, new_position = result
-            self.last_position = new_position
-            
-            all_kills = file_content.strip().splitlines()
-            updated = False
-            
-            for kill_line in all_kills:
-                if self.parse_kill_feed(kill_line + '\n'):
-                    updated = True
-            
-            if updated:
+            await self.load_stats()
+            new_kills = []
+            batch_keys = set()
+            for event in self.retry_kills + list(kill_events):
+                # Stejný kill může být v dávce víckrát, okno se do zápisu nemění
+                batch_key = (event.timestamp, self.kill_key(event))
+                if batch_key not in batch_keys and self.process_kill_event(event):
+                    batch_keys.add(batch_key)
+                    new_kills.append(event)
+            for event in new_kills:
+                self.player_index.add(event.killer_id, event.killer)
+                if event.victim_id:
+                    self.player_index.add(event.victim_id, event.victim)
+            # Celá dávka z logu jednou transakcí
+            try:
+                await self.store.record_kills(new_kills)
+            except Exception:
+                if len(new_kills) > KILL_RETRY_LIMIT:
+                    logging.error(f"Dropping {len(new_kills) - KILL_RETRY_LIMIT} unsaved kills over the retry limit")
+                self.retry_kills = new_kills[-KILL_RETRY_LIMIT:]
+                raise
+            self.retry_kills = []
+            # Jako zpracované až po zápisu, jinak by je okno při další dávce přeskočilo
+            for event in new_kills:
+                self.processed_kills.seen(event.timestamp, self.kill_key(event))
+
+            # Přirozená smrt se do žebříčku nepočítá
+            counted = [event for event in new_kills if not event.natural and event.victim_id]
+            for event in counted:
+                self.leaderboard.add(event.killer_id)
+            if counted:
                 # Aktualizuj zprávu pouze pokud byly změny
-                await self.update_stats_message()
+                self.update_stats_message()
                 
         except Exception as e:
             logging.error(f"Error in check_kill_feed loop: {e}")
 
-    def get_top_killers(self, limit=10):
+    def is_kill_player(self, player_id):
+        """Dočasná ID z playtime (temp_jméno) nemají statistiky zabíjení"""
+        return not player_id.startswith("temp_")
+
+    def find_player_by_name(self, name):
+        """
+        Steam ID podle jména (i dřívějšího); při shodě jmen vyhrává hráč s více killy.
+        Bez přesné shody vezme první výsledek hledání podle začátku jména nebo s jedním překlepem.
+        """
+        player_ids = [player_id for player_id in self.player_index.find(name) if self.is_kill_player(player_id)]
+        if player_ids:
+            return max(player_ids, key=self.leaderboard.score)
+        results = self.player_index.search(name, limit=1, include=self.is_kill_player)
+        return results[0][0] if results else None
+
+    async def get_top_killers(self, limit=10):
         """Vrátí top X zabijáků podle počtu zabití"""
-        sorted_stats = sorted(
-            [(id, stats) for id, stats in self.kill_stats.items() if stats["kills"] > 0],
-            key=lambda x: x[1]["kills"],
-            reverse=True
-        )
-        return sorted_stats[:limit]
+        await self.load_stats()
+        return [(player_id, await self.store.player_stats(player_id)) for player_id, _ in self.leaderboard.top(limit)]
 
-    def get_player_stats(self, player_id):
+    async def get_player_stats(self, player_id):
         """Vrátí statistiky konkrétního hráče"""
-        stats = self.kill_stats.get(player_id, {"kills": 0, "deaths": 0, "player_name": "Unknown", "dinos": {}})
+        stats = await self.store.player_stats(player_id)
         logging.info(f"Získány statistiky hráče {player_id}: {stats}")
         return stats
 
@@ -259,7 +184,7 @@ class KillStats(commands.Cog):
         
         embed.set_footer(text=f"Last updated: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
         
-        top_killers = self.get_top_killers(10)
+        top_killers = await self.get_top_killers(10)
         
         if not top_killers:
             embed.add_field(name="No statistics", value="There are no kill records yet", inline=False)
@@ -281,7 +206,7 @@ class KillStats(commands.Cog):
 
     async def create_player_stats_embed(self, player_id):
         """Vytvoří embed zprávu s detailními statistikami hráče"""
-        stats = self.get_player_stats(player_id)
+        stats = await self.get_player_stats(player_id)
         player_name = stats["player_name"] or f"Player {player_id}"
         
         # Ujisti se, že deaths je zajištěn
@@ -308,67 +233,23 @@ class KillStats(commands.Cog):
             embed.add_field(name="Kills by Dinosaur", value=dino_text, inline=False)
         
         # Najdi pořadí v žebříčku
-        sorted_stats = sorted(
-            [(id, st) for id, st in self.kill_stats.items() if st["kills"] > 0],
-            key=lambda x: x[1]["kills"],
-            reverse=True
-        )
-        
-        rank = next((i for i, (pid, _) in enumerate(sorted_stats, 1) if pid == player_id), None)
+        await self.load_stats()
+        rank = self.leaderboard.rank(player_id)
         if rank:
-            embed.add_field(name="Leaderboard Rank", value=f"#{rank} of {len(sorted_stats)}", inline=False)
+            percentile = self.leaderboard.percentile(player_id)
+            embed.add_field(
+                name="Leaderboard Rank",
+                value=f"#{rank} of {len(self.leaderboard)} (better than {percentile:.0f}% of killers)",
+                inline=False
+            )
         
         embed.set_footer(text=f"Steam ID: {player_id} | Updated: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
         return embed
 
-    @tasks.loop(minutes=1)
-    async def update_stats_message(self):
-        """Aktualizuje zprávu s top 10 zabijáky v určeném kanálu každou minutu"""
-        try:
-            channel = self.bot.get_channel(self.stats_channel_id)
-            if not channel:
-                logging.error("Stats channel not found.")
-                return
-                
-            embed = await self.create_stats_embed()
-            
-            # Pokud zpráva neexistuje, pokus se ji najít v kanálu, místo vytvoření nové
-            if not self.stats_message:
-                # Hledej existující zprávu v kanálu
-                found_message = None
-                async for message in channel.history(limit=10):
-                    # Kontroluj, zda zpráva je od bota a obsahuje embed s očekávaným nadpisem
-                    if message.author.id == self.bot.user.id and message.embeds:
-                        for msg_embed in message.embeds:
-                            if msg_embed.title and "Top 10 Killers" in msg_embed.title:
-                                found_message = message
-                                break
-                        if found_message:
-                            break
-                
-                # Pokud zpráva byla nalezena, aktualizuj ji, jinak vytvoř novou
-                if found_message:
-                    self.stats_message = found_message
-                    await found_message.edit(embed=embed)
-                    logging.info("Nalezena a aktualizována existující zpráva s top 10 zabijáky")
-                else:
-                    # Zpráva nebyla nalezena, vytvoř novou
-                    self.stats_message = await channel.send(embed=embed)
-                    logging.info("Vytvořena nová zpráva s top 10 zabijáky")
-            else:
-                # Aktualizuj existující zprávu
-                try:
-                    message = await channel.fetch_message(self.stats_message.id)
-                    await message.edit(embed=embed)
-                    logging.info("Aktualizována zpráva s top 10 zabijáky")
-                except (nextcord.NotFound, nextcord.HTTPException) as e:
-                    logging.error(f"Chyba při aktualizaci zprávy: {e}")
-                    # Zpráva byla smazána, vytvoř novou
-                    self.stats_message = await channel.send(embed=embed)
-                    logging.info("Vytvořena nová zpráva s top 10 zabijáky (původní nebyla nalezena)")
-                    
-        except Exception as e:
-            logging.error(f"Error updating stats message: {e}")
+    def update_stats_message(self):
+        """Požádá o aktualizaci zprávy s top 10 zabijáky (edituje se jen při změně)"""
+        self.live_embeds.request_update("kill_stats")
+
     @nextcord.slash_command(name="kills", description="View player kill statistics")
     async def show_kills(self, 
                         interaction: nextcord.Interaction, 
@@ -402,21 +283,18 @@ class KillStats(commands.Cog):
         
         # If only name is provided, try to find the corresponding Steam ID
         if not target_id and name:
-            found = False
-            for player_id, stats in self.kill_stats.items():
-                if stats["player_name"].lower() == name.lower():
-                    target_id = player_id
-                    found = True
-                    logging.info(f"Found player by name: {name} -> Steam ID: {target_id}")
-                    break
+            await self.load_stats()
+            target_id = self.find_player_by_name(name)
+            if target_id:
+                logging.info(f"Found player by name: {name} -> Steam ID: {target_id}")
             
             # If we couldn't find a match by name
-            if not found:
+            else:
                 await interaction.response.send_message(f"Could not find player with name '{name}'. Please check the spelling or try using Steam ID instead.", ephemeral=True)
                 return
         
         # Get player statistics
-        stats = self.get_player_stats(target_id)
+        stats = await self.get_player_stats(target_id)
         
         # Check if player has any kills or deaths to determine if they exist in our records
         if stats["kills"] == 0 and stats["deaths"] == 0 and not stats["dinos"]:
@@ -426,6 +304,17 @@ class KillStats(commands.Cog):
         # Create and send the embed with player statistics
         embed = await self.create_player_stats_embed(target_id)
         await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @show_kills.on_autocomplete("name")
+    async def autocomplete_kills_name(self, interaction: nextcord.Interaction, name: str):
+        """Našeptává jména hráčů; bez zadaného textu nabídne nejlepší zabijáky"""
+        if not name:
+            names = [self.player_index.name(player_id) for player_id, _ in self.leaderboard.top(25)]
+            await interaction.response.send_autocomplete(list(dict.fromkeys(n for n in names if n)))
+            return
+        await interaction.response.send_autocomplete(
+            self.player_index.suggestions(name, include=self.is_kill_player)
+        )
         
     @nextcord.slash_command(name="resetstats", description="Reset kill statistics (Admin only)", guild_ids=DEFAULT_GUILDS)
     async def reset_stats(self, interaction: nextcord.Interaction, confirm: str = nextcord.SlashOption(
@@ -451,19 +340,16 @@ class KillStats(commands.Cog):
             await interaction.response.send_message("Operation canceled. You must type 'CONFIRM' to reset statistics.", ephemeral=True)
             return
             
-        # Reset statistik - vyčistíme slovník, ale zachováme defaultdict funkcionalitu
-        self.kill_stats.clear()
-        self.processed_kills.clear()
-        
-        # Uložení prázdných statistik do souborů
+        # Uložení prázdných statistik
         try:
-            # Vymaž soubor se statistikami kompletně a vytvoř nový prázdný
+            # Vynuluj statistiky v databázi a export pro web
+            await self.store.reset()
+            self.leaderboard.clear()
             with open(self.stats_file, 'w') as f:
                 json.dump({}, f)
                 
-            # Vymaž soubor se zpracovanými killy
-            with open(self.processed_kills_file, 'w') as f:
-                json.dump([], f)
+            # Vymaž zpracované killy (uloží se prázdné okno)
+            self.processed_kills.clear()
                 
             logging.info(f"Statistics files reset successfully by {interaction.user.name}")
         except Exception as e:
@@ -472,7 +358,7 @@ class KillStats(commands.Cog):
             return
         
         # Aktualizace zobrazené zprávy
-        await self.update_stats_message()
+        self.update_stats_message()
         
         # Informace o úspěšném resetu
         await interaction.response.send_message("All kill statistics have been reset successfully!", ephemeral=True)
@@ -483,16 +369,16 @@ class KillStats(commands.Cog):
         """Spustí se, když je bot připraven"""
         logging.info("KillStats cog is ready!")
         # Okamžitě aktualizuj statistickou zprávu
-        await self.update_stats_message()
+        self.update_stats_message()
         logging.info("Forced stats message update on bot start")
 
     def cog_unload(self):
         """Spustí se při odebírání cogu"""
-        self.check_kill_feed.cancel()
-        self.update_stats_message.cancel()
+        self.log_tail.unsubscribe(self.check_kill_feed)
+        self.live_embeds.unregister("kill_stats")
         self.save_stats_periodic.cancel()
-        self.save_stats()  # Ulož statistiky při vypnutí
         self.save_processed_kills()  # Ulož zpracované killy při vypnutí
+        asyncio.create_task(self.store.close())
 
 def setup(bot):
     if ENABLE_LOGGING:
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import os
+import aiosqlite
+from util.config import KILLFEED_DB
+
+# Tabulky patří jen botovi: web (services/bounty.js) má vlastní player_bounty_stats
+# a statistiky killů čte z exportu kill_stats.json, ne z této databáze
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_name TEXT NOT NULL,
+    player_id TEXT NOT NULL UNIQUE,
+    kills INTEGER DEFAULT 0,
+    deaths INTEGER DEFAULT 0,
+    current_streak INTEGER DEFAULT 0,
+    best_streak INTEGER DEFAULT 0,
+    bounty_points INTEGER DEFAULT 0,
+    bounty_spent INTEGER DEFAULT 0,
+    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS player_dino_kills (
+    player_id TEXT NOT NULL,
+    dino TEXT NOT NULL,
+    kills INTEGER DEFAULT 0,
+    PRIMARY KEY (player_id, dino)
+);
+CREATE INDEX IF NOT EXISTS idx_player_stats_kills ON player_stats (kills DESC);
+CREATE INDEX IF NOT EXISTS idx_player_stats_name ON player_stats (player_name COLLATE NOCASE);
+"""
+
+UPSERT_NAME = """
+INSERT INTO player_stats (player_name, player_id) VALUES (?, ?)
+ON CONFLICT (player_id) DO UPDATE SET player_name = excluded.player_name, last_updated = CURRENT_TIMESTAMP
+"""
+UPSERT_KILL = """
+INSERT INTO player_stats (player_name, player_id, kills, current_streak, best_streak) VALUES (?, ?, 1, 1, 1)
+ON CONFLICT (player_id) DO UPDATE SET
+    player_name = excluded.player_name,
+    kills = kills + 1,
+    current_streak = current_streak + 1,
+    best_streak = MAX(best_streak, current_streak + 1),
+    last_updated = CURRENT_TIMESTAMP
+"""
+UPSERT_DEATH = """
+INSERT INTO player_stats (player_name, player_id, deaths) VALUES (?, ?, 1)
+ON CONFLICT (player_id) DO UPDATE SET
+    player_name = excluded.player_name,
+    deaths = deaths + 1,
+    current_streak = 0,
+    last_updated = CURRENT_TIMESTAMP
+"""
+UPSERT_DINO = """
+INSERT INTO player_dino_kills (player_id, dino, kills) VALUES (?, ?, 1)
+ON CONFLICT (player_id, dino) DO UPDATE SET kills = kills + 1
+"""
+
+class KillStore:
+    """
+    Statistiky zabíjení v SQLite (killfeed.db, tabulka player_stats).
+    Jedno dlouhodobé spojení ve WAL režimu, killy z jedné dávky logu se zapíší v jedné transakci.
+    """
+    def __init__(self, path=KILLFEED_DB):
+        self.path = path
+        self.db = None
+        self.open_lock = asyncio.Lock()
+
+    async def connection(self):
+        async with self.open_lock:
+            if self.db is None:
+                db = await aiosqlite.connect(self.path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.executescript(SCHEMA)
+                await db.commit()
+                self.db = db
+        return self.db
+
+    async def record_kills(self, events):
+        """Zapíše dávku KillEvent jednou transakcí; přirozená smrt jen aktualizuje jméno"""
+        if not events:
+            return
+        db = await self.connection()
+        try:
+            for event in events:
+                if event.natural or not event.victim_id:
+                    await db.execute(UPSERT_NAME, (event.killer, event.killer_id))
+                    continue
+                await db.execute(UPSERT_KILL, (event.killer, event.killer_id))
+                await db.execute(UPSERT_DINO, (event.killer_id, event.killer_dino))
+                await db.execute(UPSERT_DEATH, (event.victim, event.victim_id))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+    async def kill_counts(self):
+        """Vrátí [(player_id, kills)] hráčů s aspoň jedním killem, pro naplnění žebříčku při startu"""
+        db = await self.connection()
+        async with db.execute("SELECT player_id, kills FROM player_stats WHERE kills > 0") as cursor:
+            return await cursor.fetchall()
+
+    async def player_names(self):
+        """Vrátí [(player_id, player_name)] všech hráčů, pro naplnění indexu hledání při startu"""
+        db = await self.connection()
+        async with db.execute("SELECT player_id, player_name FROM player_stats") as cursor:
+            return await cursor.fetchall()
+
+    async def player_stats(self, player_id):
+        """Statistiky hráče ve stejném tvaru jako dřív kill_stats.json"""
+        db = await self.connection()
+        async with db.execute(
+            "SELECT player_name, kills, deaths, current_streak, best_streak FROM player_stats WHERE player_id = ?",
+            (player_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return {"kills": 0, "deaths": 0, "player_name": "Unknown", "dinos": {}}
+        async with db.execute(
+            "SELECT dino, kills FROM player_dino_kills WHERE player_id = ? ORDER BY kills DESC", (player_id,)
+        ) as cursor:
+            dinos = {dino: kills for dino, kills in await cursor.fetchall()}
+        name, kills, deaths, current_streak, best_streak = row
+        return {
+            "kills": kills, "deaths": deaths, "player_name": name, "dinos": dinos,
+            "current_streak": current_streak, "best_streak": best_streak
+        }
+
+    async def all_stats(self):
+        """Všechny statistiky jako slovník {player_id: stats} (export pro web)"""
+        db = await self.connection()
+        stats = {}
+        async with db.execute("SELECT player_id, player_name, kills, deaths FROM player_stats") as cursor:
+            async for player_id, name, kills, deaths in cursor:
+                stats[player_id] = {"kills": kills, "deaths": deaths, "player_name": name, "dinos": {}}
+        async with db.execute("SELECT player_id, dino, kills FROM player_dino_kills") as cursor:
+            async for player_id, dino, kills in cursor:
+                if player_id in stats:
+                    stats[player_id]["dinos"][dino] = kills
+        return stats
+
+    async def reset(self):
+        """Vynuluje statistiky zabíjení, bounty body webu zůstanou"""
+        db = await self.connection()
+        await db.execute("UPDATE player_stats SET kills = 0, deaths = 0, current_streak = 0, best_streak = 0")
+        await db.execute("DELETE FROM player_dino_kills")
+        await db.commit()
+
+    async def import_json(self, path):
+        """Jednorázově převede starý kill_stats.json do databáze, pokud v ní ještě nejsou žádné killy"""
+        if not os.path.exists(path):
+            return False
+        db = await self.connection()
+        async with db.execute("SELECT COUNT(*) FROM player_stats WHERE kills > 0 OR deaths > 0") as cursor:
+            if (await cursor.fetchone())[0]:
+                return False
+        with open(path, 'r') as f:
+            data = json.load(f)
+        await db.executemany(
+            "INSERT INTO player_stats (player_name, player_id, kills, deaths) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (player_id) DO UPDATE SET player_name = excluded.player_name, "
+            "kills = excluded.kills, deaths = excluded.deaths",
+            [(stats.get("player_name", ""), player_id, stats.get("kills", 0), stats.get("deaths", 0))
+             for player_id, stats in data.items()]
+        )
+        await db.executemany(
+            "INSERT OR REPLACE INTO player_dino_kills (player_id, dino, kills) VALUES (?, ?, ?)",
+            [(player_id, dino, count)
+             for player_id, stats in data.items() for dino, count in stats.get("dinos", {}).items()]
+        )
+        await db.commit()
+        logging.info(f"Imported {len(data)} players from {path} into {self.path}")
+        return True
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
@@ -0,0 +1,135 @@
+import random
+
+class _Node:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key):
+        self.key = key
+        self.priority = random.random()
+        self.size = 1
+        self.left = None
+        self.right = None
+
+def _size(node):
+    return node.size if node is not None else 0
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    return node
+
+def _split(node, key):
+    """Rozdělí strom na (klíče < key, klíče >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, key)
+    node.left = right
+    return left, _update(node)
+
+def _merge(left, right):
+    """Spojí dva stromy, kde všechny klíče left < všechny klíče right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+class Leaderboard:
+    """
+    Žebříček s order-statistics (treap s velikostmi podstromů).
+    Změna skóre, pořadí hráče i top N stojí O(log n) místo řazení všech hráčů.
+    Hráči se skóre 0 v žebříčku nejsou, stejně jako dřív v seřazeném výpisu.
+    """
+    def __init__(self):
+        self.root = None
+        self.scores = {}
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, player_id):
+        return player_id in self.scores
+
+    def score(self, player_id):
+        return self.scores.get(player_id, 0)
+
+    def update(self, player_id, score):
+        """Nastaví skóre hráče, skóre <= 0 hráče ze žebříčku odebere"""
+        self.remove(player_id)
+        if score <= 0:
+            return
+        # Vyšší skóre dřív, při shodě rozhoduje ID, aby byl klíč jednoznačný
+        key = (-score, player_id)
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key)), right)
+        self.scores[player_id] = score
+
+    def add(self, player_id, amount=1):
+        self.update(player_id, self.score(player_id) + amount)
+
+    def remove(self, player_id):
+        score = self.scores.pop(player_id, None)
+        if score is None:
+            return
+        key = (-score, player_id)
+        left, right = _split(self.root, key)
+        # Vyjmutí přesně jednoho klíče: z pravé části odtrhneme nejmenší prvek
+        _, right = self._split_first(right)
+        self.root = _merge(left, right)
+
+    def _split_first(self, node):
+        if node is None:
+            return None, None
+        if node.left is None:
+            rest = node.right
+            node.right = None
+            return _update(node), rest
+        first, node.left = self._split_first(node.left)
+        return first, _update(node)
+
+    def rank(self, player_id):
+        """Pořadí hráče od 1, None pokud v žebříčku není"""
+        score = self.scores.get(player_id)
+        if score is None:
+            return None
+        key = (-score, player_id)
+        node, rank = self.root, 0
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                rank += _size(node.left) + 1
+                node = node.right
+            else:
+                return rank + _size(node.left) + 1
+        return None
+
+    def percentile(self, player_id):
+        """Procento hráčů v žebříčku, které hráč předbíhá (100 = první), None pokud v žebříčku není"""
+        rank = self.rank(player_id)
+        if rank is None:
+            return None
+        return 100.0 * (len(self) - rank) / len(self) if len(self) > 1 else 100.0
+
+    def top(self, limit=10):
+        """Vrátí [(player_id, skóre)] prvních limit hráčů"""
+        result, stack, node = [], [], self.root
+        while (stack or node is not None) and len(result) < limit:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            result.append((node.key[1], -node.key[0]))
+            node = node.right
+        return result
+
+    def clear(self):
+        self.root = None
+        self.scores = {}
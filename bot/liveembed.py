@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import tempfile
+import nextcord
+from util.config import LIVE_EMBED_FILE, LIVE_EMBED_DEBOUNCE
+
+# Části embedu, které se mění s každým vykreslením (čas aktualizace) a do otisku nepatří
+VOLATILE_KEYS = ("timestamp", "footer")
+
+def embed_hash(embed):
+    """Otisk obsahu embedu bez časových údajů"""
+    data = {key: value for key, value in embed.to_dict().items() if key not in VOLATILE_KEYS}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+class LiveEmbeds:
+    """
+    Trvalé dashboard zprávy (žebříčky, aktivní hráči) sdílené všemi cogy.
+    ID zpráv a otisk posledního obsahu se ukládají do LIVE_EMBED_FILE, takže se po restartu
+    neprohledává historie kanálu. Požadavky na aktualizaci se sdruží za LIVE_EMBED_DEBOUNCE sekund
+    a zpráva se edituje jen tehdy, když se vykreslený obsah opravdu změnil.
+    """
+    def __init__(self, bot, path=LIVE_EMBED_FILE):
+        self.bot = bot
+        self.path = path
+        self.renderers = {}
+        self.messages = self.load()
+        self.dirty = set()
+        self.flush_task = None
+        self.flush_lock = asyncio.Lock()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading live embed data: {e}")
+        return {}
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".liveembed-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.messages, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"Error saving live embed data: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def register(self, key, channel_id, render, message_id=None, adopt_title=None):
+        """
+        Zaregistruje dashboard zprávu. render() vrací nextcord.Embed (může být async).
+        message_id převezme zprávu, jejíž ID měl cog dřív uložené po svém; adopt_title jednorázově
+        najde starou zprávu podle titulku, dokud pro klíč není uložené žádné ID.
+        """
+        self.renderers[key] = (channel_id, render, adopt_title)
+        entry = self.messages.get(key)
+        if entry is None or entry.get("channel_id") != channel_id:
+            self.messages[key] = {"channel_id": channel_id, "message_id": message_id, "hash": None}
+            self.save()
+
+    def unregister(self, key):
+        self.renderers.pop(key, None)
+        self.dirty.discard(key)
+
+    def message_id(self, key):
+        entry = self.messages.get(key)
+        return entry.get("message_id") if entry else None
+
+    def request_update(self, key):
+        """Označí zprávu k aktualizaci, edituje se sdruženě po LIVE_EMBED_DEBOUNCE sekundách"""
+        if key not in self.renderers:
+            return
+        self.dirty.add(key)
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        while True:
+            await asyncio.sleep(LIVE_EMBED_DEBOUNCE)
+            await self.flush()
+            # Požadavky, které přišly během vykreslování, čekají na další kolo
+            if not self.dirty:
+                return
+
+    async def flush(self):
+        """Vykreslí všechny označené zprávy a pošle jen skutečné změny"""
+        await self.bot.wait_until_ready()
+        async with self.flush_lock:
+            keys, self.dirty = self.dirty, set()
+            changed = False
+            for key in keys:
+                try:
+                    changed |= await self.refresh(key)
+                except Exception as e:
+                    logging.error(f"Error updating live embed {key}: {e}")
+            if changed:
+                self.save()
+
+    async def refresh(self, key):
+        if key not in self.renderers:
+            return False
+        channel_id, render, adopt_title = self.renderers[key]
+        embed = render()
+        if inspect.isawaitable(embed):
+            embed = await embed
+        digest = embed_hash(embed)
+        entry = self.messages[key]
+        if entry["message_id"] and entry["hash"] == digest:
+            return False
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            logging.error(f"Live embed channel {channel_id} for {key} not found")
+            return False
+        if not entry["message_id"] and adopt_title:
+            entry["message_id"] = await self.find_existing(channel, adopt_title)
+        if entry["message_id"]:
+            try:
+                # Částečná zpráva: edit bez předchozího fetch_message
+                await channel.get_partial_message(entry["message_id"]).edit(embed=embed)
+                entry["hash"] = digest
+                logging.info(f"Live embed {key} updated")
+                return True
+            except nextcord.NotFound:
+                logging.info(f"Live embed message for {key} was deleted, creating a new one")
+        message = await channel.send(embed=embed)
+        entry["message_id"] = message.id
+        entry["hash"] = digest
+        logging.info(f"Live embed {key} created: {message.id}")
+        return True
+
+    async def find_existing(self, channel, title):
+        """Jednorázové převzetí zprávy z doby před ukládáním ID"""
+        async for message in channel.history(limit=20):
+            if message.author == self.bot.user and message.embeds and title in (message.embeds[0].title or ""):
+                logging.info(f"Adopted existing message {message.id} with title '{title}'")
+                return message.id
+        return None
+
+def get_live_embeds(bot):
+    """Vrátí sdílenou instanci LiveEmbeds pro daného bota"""
+    if not hasattr(bot, "live_embeds"):
+        bot.live_embeds = LiveEmbeds(bot)
+    return bot.live_embeds
@@ -1,23 +1,30 @@
 import nextcord
-from nextcord.ext import commands, tasks
-from gamercon_async import EvrimaRCON
-import re
+from nextcord.ext import commands
 import logging
 import asyncio
 import os
 import json
 import datetime
-import io
-import requests
-from PIL import Image, ImageDraw, ImageFont
 from util.config import RCON_HOST, RCON_PORT, RCON_PASS
 from util.database import DB_PATH
+from util.playerindex import PlayerIndex, get_player_index
+from util.rconsnapshot import get_rcon_snapshots
+from util.maprender import MapRenderer, RenderCache, output_extension
+from util.mapcache import MapImageCache
+from util.maptiles import TilePyramid, MapTileServer
 import aiosqlite
 
 # Konfigurace pro mapu
 MAP_CONFIG = {
     # URL k obrázku mapy
     "map_image_url": "https://dc.karelkana.eu/worldmap.png",
+    # Lokální kopie staženého obrázku a mapa přibalená k webu pro případ, že URL není dostupná
+    "map_cache_file": "temp/worldmap.png",
+    "map_fallback_file": "public/worldmap.png",
+    # Dekódovaný raster mapy (syrové RGBA + zmenšeniny), sdílený procesy rendereru přes mmap
+    "map_raster_dir": "temp/raster",
+    # Dlaždice 256 px pro webovou mapu (z/x/y), vytvářejí se při prvním požadavku
+    "map_tile_dir": "temp/tiles",
     # Transformační parametry pro herní souřadnice
     "game_min_x": -400000,
     "game_max_x": 400000,
@@ -25,6 +32,14 @@ MAP_CONFIG = {
     "game_max_y": 400000,
     # Velikost mapy v pixelech
     "map_size": 8192,
+    # Šířka zmenšené mapy pro přehled všech hráčů (mapa_vsech)
+    "overview_size": 2048,
+    # Formát posílaných obrázků: png, png8 (paleta), webp nebo jpeg; kvalita pro webp/jpeg
+    "output_format": "png",
+    "output_quality": 80,
+    # Větší obrázky se před odesláním zmenší (limit příloh Discordu je 8 MB)
+    "output_max_pixels": 2048 * 2048,
+    "output_max_bytes": 8 * 1024 * 1024,
     # Interval aktualizace dat v sekundách
     "update_interval": 30,
     # Složka pro ukládání dočasných obrázků
@@ -50,7 +65,17 @@ class PlayerMapCog(commands.Cog):
         self.rcon_port = RCON_PORT
         self.rcon_password = RCON_PASS
         self.player_data = []
-        self.map_image = None
+        self.data_timestamp = None
+        self.snapshot_version = 0
+        # Sdílený index všech známých hráčů a malý index právě online hráčů pro hledání a našeptávání
+        self.player_index = get_player_index(bot)
+        self.online_index = PlayerIndex()
+        # PNG mapy; dekódovanou mapu drží jen procesy rendereru
+        self.map_bytes = None
+        self.renderer = MapRenderer()
+        # Hotové obrázky pro aktuální data; verze roste s každým snímkem a změnou kalibrace
+        self.render_cache = RenderCache()
+        self.render_version = 0
         self.map_timestamp = None
         print("PlayerMapCog inicializován")
 
@@ -62,18 +87,32 @@ class PlayerMapCog(commands.Cog):
         self.config_file = "map_config.json"
         self.config = self.load_config()
         
-        # Stažení obrázku mapy
-        self.download_map_image()
-        
-        # Spuštění úlohy pro aktualizaci dat o hráčích
-        self.update_player_data_task.start()
+        # Mapa se načte z disku na pozadí a stažení novější verze start bota nezdržuje
+        self.map_cache = MapImageCache(
+            self.config["map_image_url"], self.config["map_cache_file"], self.config["map_fallback_file"]
+        )
+        # Dlaždice a vrstva hráčů pro webovou mapu přes lokální HTTP endpoint
+        self.tiles = TilePyramid(self.config["map_tile_dir"])
+        self.tile_server = MapTileServer(self.tiles)
+        self.renderer_start = self.bot.loop.create_task(self.load_map())
+        
+        # Data o hráčích přicházejí ze sdíleného snímku RCON (interval RCON_SNAPSHOT_INTERVAL),
+        # update_interval mapy jen omezuje stáří dat, se kterými příkazy mapy pracují
+        self.snapshots = get_rcon_snapshots(bot)
+        self.snapshots.subscribe(self.on_snapshot)
+    
+    def cog_unload(self):
+        self.snapshots.unsubscribe(self.on_snapshot)
+        self.renderer.close()
+        asyncio.create_task(self.tile_server.close())
         
     def load_config(self):
         """Načte konfigurační soubor nebo vytvoří nový s výchozími hodnotami"""
         if os.path.exists(self.config_file):
             try:
                 with open(self.config_file, 'r') as f:
-                    return json.load(f)
+                    # Výchozí hodnoty doplní klíče přidané po vytvoření souboru
+                    return {**MAP_CONFIG, **json.load(f)}
             except Exception as e:
                 logging.error(f"Chyba při načítání konfiguračního souboru: {e}")
         
@@ -101,280 +140,63 @@ class PlayerMapCog(commands.Cog):
             logging.error(f"Chyba při ukládání konfigurace: {e}")
             return False
     
-    def download_map_image(self):
-        """Stáhne obrázek mapy a uloží ho do paměti"""
-        try:
-            response = requests.get(self.config["map_image_url"])
-            if response.status_code == 200:
-                self.map_image = Image.open(io.BytesIO(response.content))
-                self.map_timestamp = datetime.datetime.now()
-                logging.info(f"Obrázek mapy úspěšně stažen z {self.config['map_image_url']}")
-            else:
-                logging.error(f"Nepodařilo se stáhnout obrázek mapy: Status {response.status_code}")
-        except Exception as e:
-            logging.error(f"Chyba při stahování obrázku mapy: {e}")
-    
-    @tasks.loop(seconds=MAP_CONFIG["update_interval"])
-    async def update_player_data_task(self):
-        """Pravidelně aktualizuje data o hráčích"""
-        try:
-            # Načtení aktuálního intervalu z konfigurace
-            self.update_player_data_task.change_interval(seconds=self.config["update_interval"])
-            
-            # Získání informací o všech online hráčích
-            player_data = await self.get_all_player_info()
-            
-            if player_data:
-                self.player_data = player_data
-                logging.info(f"Data o hráčích byla aktualizována - {len(player_data)} hráčů online")
-            else:
-                logging.warning("Nepodařilo se získat data o hráčích.")
-        except Exception as e:
-            logging.error(f"Chyba při aktualizaci dat o hráčích: {e}", exc_info=True)
-    
-    # Zajistit, aby úloha nezačala běžet, dokud bot není připraven
-    @update_player_data_task.before_loop
-    async def before_update_task(self):
-        await self.bot.wait_until_ready()
+    async def load_map(self):
+        """Spustí renderer s mapou z cache (nebo záložní) a na pozadí zkontroluje novější verzi"""
+        data = await self.map_cache.load_local()
+        if data is None:
+            # Bez lokální kopie nezbývá než počkat na stažení
+            await self.refresh_map()
+            return
+        self.map_bytes = data
+        self.map_timestamp = datetime.datetime.now()
+        await self.start_renderer()
+        self.bot.loop.create_task(self.refresh_map())
     
-    async def get_all_player_info(self):
-        """Získá informace o všech online hráčích"""
-        # Získání seznamu online hráčů
-        online_players = await self.get_online_players()
-        
-        if not online_players:
-            return []
-        
-        # Získání detailních informací o všech hráčích
-        player_info = await self.get_player_info_batch(online_players)
-        
-        return player_info
+    async def refresh_map(self):
+        """Stáhne mapu, pokud se na serveru změnila, a přepne na ni renderer"""
+        data = await self.map_cache.revalidate()
+        if data is None:
+            return
+        self.map_bytes = data
+        self.map_timestamp = datetime.datetime.now()
+        await self.start_renderer()
+        self.invalidate_renders()
     
-    async def get_online_players(self):
-        """Získá seznam online hráčů pomocí RCON playerlist příkazu"""
-        rcon = None
-        try:
-            # Vytvoření RCON připojení
-            rcon = EvrimaRCON(self.rcon_host, self.rcon_port, self.rcon_password)
-            await rcon.connect()
-            
-            # RCON příkaz pro získání seznamu hráčů
-            command = b'\x02' + b'\x40' + b'\x00'
-            response = await rcon.send_command(command)
-            
-            # Vyhledání Steam ID v odpovědi
-            if response:
-                # Některé RCON odpovědi mohou být bytové řetězce
-                if isinstance(response, bytes):
-                    response_str = response.decode('utf-8', errors='ignore')
-                else:
-                    response_str = str(response)
-                
-                # Extrakce Steam ID hráčů
-                id_pattern = r"Steam64ID: (\d+)"
-                player_ids = re.findall(id_pattern, response_str)
-                
-                logging.info(f"Nalezeno {len(player_ids)} online hráčů: {player_ids}")
-                return player_ids
-            
-            # Žádná odpověď z RCON
-            logging.warning(f"Prázdná odpověď z RCON playerlist")
-            return []
-            
-        except Exception as e:
-            logging.error(f"Chyba při získávání seznamu online hráčů: {e}", exc_info=True)
-            return []
-        finally:
-            # Bezpečné uzavření RCON spojení
-            if rcon:
-                try:
-                    if hasattr(rcon, 'close') and callable(getattr(rcon, 'close')):
-                        await rcon.close()
-                except Exception as close_error:
-                    logging.error(f"Chyba při uzavírání RCON spojení: {close_error}")
+    def on_snapshot(self, snapshot):
+        """Převezme data o hráčích z nového snímku sdíleného RconSnapshots"""
+        # Snímek už mohl převzít refresh_player_data dřív, než ho dostali odběratelé
+        if snapshot.version <= self.snapshot_version:
+            return
+        self.snapshot_version = snapshot.version
+        player_data = list(snapshot.player_info.values())
+        self.player_data = player_data
+        self.data_timestamp = datetime.datetime.fromtimestamp(snapshot.taken).strftime("%H:%M:%S")
+        self.invalidate_renders()
+        self.tile_server.set_players(snapshot, player_data, self.config)
+        self.online_index = PlayerIndex()
+        for player in player_data:
+            self.online_index.add(player.id, player.name)
+            self.player_index.add(player.id, player.name)
+        logging.info(f"Data o hráčích byla aktualizována - {len(player_data)} hráčů online")
     
-    async def get_player_info_batch(self, steam_ids):
-        """Získá informace o více hráčích najednou"""
-        if not steam_ids:
-            return []
-        
-        # Získání všech informací o hráčích pomocí playerinfo příkazu
-        rcon = None
-        all_player_info = []
-        
-        try:
-            # Vytvoření RCON připojení
-            rcon = EvrimaRCON(self.rcon_host, self.rcon_port, self.rcon_password)
-            await rcon.connect()
-            
-            # RCON příkaz pro získání informací o všech hráčích
-            command = b'\x02' + b'\x77' + b'\x00'
-            response = await rcon.send_command(command)
-            
-            if not response:
-                logging.warning(f"Prázdná odpověď z RCON playerinfo")
-                return []
-            
-            # Převod odpovědi na string
-            if isinstance(response, bytes):
-                response_str = response.decode('utf-8', errors='ignore')
-            else:
-                response_str = str(response)
-            
-            # Rozdělení odpovědi podle hráčů
-            player_sections = []
-            
-            # Metoda 1: Rozdělení podle PlayerID
-            if "PlayerID:" in response_str:
-                raw_sections = response_str.split("PlayerID:")
-                for section in raw_sections:
-                    for steam_id in steam_ids:
-                        if steam_id in section:
-                            player_sections.append({"id": steam_id, "data": "PlayerID:" + section})
-            
-            # Zpracování každé sekce
-            for player_data in player_sections:
-                steam_id = player_data["id"]
-                section = player_data["data"]
-                
-                try:
-                    # Extrakce jednotlivých údajů
-                    name_match = re.search(r'PlayerDataName:\s*([^,\n]+)', section)
-                    name_match2 = re.search(r'CharacterName:\s*([^,\n]+)', section)
-                    player_name = name_match.group(1).strip() if name_match else (name_match2.group(1).strip() if name_match2 else "Neznámý hráč")
-                    
-                    # Vyhledání pozice
-                    location_match = re.search(r'Location:\s*X=\s*([-\d\.]+)\s*Y=\s*([-\d\.]+)\s*Z=\s*([-\d\.]+)', section)
-                    pos_match = re.search(r'Position:\s*X=\s*([-\d\.]+)\s*Y=\s*([-\d\.]+)\s*Z=\s*([-\d\.]+)', section)
-                    
-                    if location_match:
-                        x, y, z = location_match.groups()
-                    elif pos_match:
-                        x, y, z = pos_match.groups()
-                    else:
-                        # Pokud nemůžeme najít standardní formát, zkusíme najít jednotlivé souřadnice kdekoliv
-                        x_match = re.search(r'X=\s*([-\d\.]+)', section)
-                        y_match = re.search(r'Y=\s*([-\d\.]+)', section)
-                        z_match = re.search(r'Z=\s*([-\d\.]+)', section)
-                        
-                        if x_match and y_match and z_match:
-                            x = x_match.group(1)
-                            y = y_match.group(1)
-                            z = z_match.group(1)
-                        else:
-                            logging.warning(f"Nepodařilo se nalézt souřadnice pro hráče {steam_id}")
-                            continue
-                    
-                    # Vyhledání třídy (dinosaurus)
-                    class_match = re.search(r'Class:\s*([^,\n]+)', section)
-                    dino_match = re.search(r'Dinosaur:\s*([^,\n]+)', section)
-                    dino_class = class_match.group(1).strip() if class_match else (dino_match.group(1).strip() if dino_match else "Unknown")
-                    
-                    # Vyhledání ostatních hodnot
-                    growth_match = re.search(r'Growth:\s*([\d\.]+)', section)
-                    growth = float(growth_match.group(1)) if growth_match else 1.0
-                    
-                    health_match = re.search(r'Health:\s*([\d\.]+)', section)
-                    health = float(health_match.group(1)) if health_match else 1.0
-                    
-                    stamina_match = re.search(r'Stamina:\s*([\d\.]+)', section)
-                    stamina = float(stamina_match.group(1)) if stamina_match else 1.0
-                    
-                    hunger_match = re.search(r'Hunger:\s*([\d\.]+)', section)
-                    hunger = float(hunger_match.group(1)) if hunger_match else 1.0
-                    
-                    thirst_match = re.search(r'Thirst:\s*([\d\.]+)', section)
-                    thirst = float(thirst_match.group(1)) if thirst_match else 1.0
-                    
-                    # Vytvoření výsledného objektu
-                    player_info = {
-                        'id': steam_id,
-                        'name': player_name,
-                        'coords': {
-                            'x': float(x),
-                            'y': float(y),
-                            'z': float(z),
-                            'formatted': f"{float(y):,.3f}, {float(x):,.3f}, {float(z):,.3f}"
-                        },
-                        'class': dino_class.replace('BP_', '').replace('_C', ''),
-                        'growth': growth * 100,
-                        'health': health * 100,
-                        'stamina': stamina * 100,
-                        'hunger': hunger * 100,
-                        'thirst': thirst * 100,
-                        'timestamp': datetime.datetime.now().strftime("%H:%M:%S")
-                    }
-                    
-                    all_player_info.append(player_info)
-                    
-                except Exception as extract_error:
-                    logging.error(f"Chyba při extrakci dat hráče {steam_id}: {extract_error}")
-            
-            return all_player_info
-            
-        except Exception as e:
-            logging.error(f"Chyba při získávání informací o hráčích: {e}")
-            return []
-        finally:
-            # Bezpečné uzavření RCON spojení
-            if rcon:
-                try:
-                    if hasattr(rcon, 'close') and callable(getattr(rcon, 'close')):
-                        await rcon.close()
-                except Exception as close_error:
-                    logging.error(f"Chyba při uzavírání RCON spojení: {close_error}")
+    async def refresh_player_data(self):
+        """Snímek ne starší než update_interval mapy (jinak se obnoví), data z něj převezme hned"""
+        snapshot = await self.snapshots.get(max_age=self.config["update_interval"])
+        if snapshot is not None:
+            self.on_snapshot(snapshot)
+        return snapshot
 
-async def is_player_online(self, steam_id):
-        """Zkontroluje, zda je hráč online pomocí RCON playerlist příkazu"""
-        rcon = None
-        try:
-            # Vytvoření RCON připojení
-            rcon = EvrimaRCON(self.rcon_host, self.rcon_port, self.rcon_password)
-            await rcon.connect()
-            
-            # RCON příkaz pro získání seznamu hráčů
-            command = b'\x02' + b'\x40' + b'\x00'
-            response = await rcon.send_command(command)
-            
-            # Vyhledání Steam ID v odpovědi
-            if response:
-                # Některé RCON odpovědi mohou být bytové řetězce
-                if isinstance(response, bytes):
-                    response_str = response.decode('utf-8', errors='ignore')
-                else:
-                    response_str = str(response)
-                
-                # Pro jistotu zkontrolujeme několik možných formátů
-                if steam_id in response_str:
-                    logging.info(f"Hráč {steam_id} je online (nalezen přímo v odpovědi)")
-                    return True
-                
-                # Zkusíme extrahovat všechna ID pomocí regex
-                id_pattern = r"Steam64ID: (\d+)"
-                player_ids = re.findall(id_pattern, response_str)
-                
-                # Kontrola, zda je ID ve výsledcích
-                is_online = steam_id in player_ids
-                logging.info(f"Hráč {steam_id} online status: {is_online}, nalezená IDs: {player_ids}")
-                return is_online
-            
-            # Žádná odpověď z RCON
-            logging.warning(f"Prázdná odpověď z RCON playerlist")
-            return False
-            
-        except Exception as e:
-            logging.error(f"Chyba při kontrole online stavu hráče: {e}", exc_info=True)
-            return False
-        finally:
-            # Bezpečné uzavření RCON spojení
-            if rcon:
-                try:
-                    if hasattr(rcon, 'close') and callable(getattr(rcon, 'close')):
-                        await rcon.close()
-                except Exception as close_error:
-                    logging.error(f"Chyba při uzavírání RCON spojení: {close_error}")
+    @property
+    def map_extension(self):
+        """Přípona příloh s mapou podle nastaveného formátu"""
+        return output_extension(self.config["output_format"])
     
-async def get_steam_id_by_discord_id(self, discord_id):
+    def invalidate_renders(self):
+        """Nová data nebo kalibrace, dříve vykreslené obrázky už neplatí"""
+        self.render_version += 1
+        self.render_cache.invalidate(self.render_version)
+    
+    async def get_steam_id_by_discord_id(self, discord_id):
         """Získá Steam ID pro daný Discord ID z databáze"""
         try:
             async with aiosqlite.connect(DB_PATH) as db:
@@ -390,221 +212,85 @@ async def get_steam_id_by_discord_id(self, discord_id):
         except Exception as e:
             logging.error(f"Chyba při získávání Steam ID pro Discord ID {discord_id}: {e}")
             return None   
-        def transform_coordinates(self, game_x, game_y):
-         """Převede herní souřadnice na souřadnice mapy podle konfigurace"""
-        # Normalizace souřadnic do rozsahu 0-1
-        norm_x = (float(game_x) - self.config["game_min_x"]) / (self.config["game_max_x"] - self.config["game_min_x"])
-        norm_y = (float(game_y) - self.config["game_min_y"]) / (self.config["game_max_y"] - self.config["game_min_y"])
-        
-        # Převod na pixely mapy (s invertováním Y souřadnice)
-        map_size = self.config["map_size"]
-        map_x = int(norm_x * map_size)
-        map_y = int((1 - norm_y) * map_size)
-        
-        return {'x': map_x, 'y': map_y}
-    
-        def create_player_list_view(self, page=0, items_per_page=10, filter_text=""):
-            """Vytvoří Discord View pro interaktivní seznam hráčů"""
+    def create_player_list_view(self, page=0, items_per_page=10, filter_text=""):
+        """Vytvoří Discord View pro interaktivní seznam hráčů"""
         # Filtrace hráčů podle textu
         filtered_players = self.player_data
         if filter_text:
-            filtered_players = [p for p in self.player_data if filter_text.lower() in p["name"].lower() or filter_text.lower() in p["class"].lower()]
+            filtered_players = [p for p in self.player_data if filter_text.lower() in p.name.lower() or filter_text.lower() in p.dino.lower()]
         
         # Vytvoření View objektu s PlayerListUI
         return PlayerListUI(self, filtered_players, page, items_per_page, filter_text)
     
-        def create_location_embed(self, player_info):
-           """Vytvoří embed s informacemi o poloze hráče"""
+    def create_location_embed(self, player_info):
+        """Vytvoří embed s informacemi o poloze hráče"""
         embed = nextcord.Embed(
-            title=f"Pozice hráče: {player_info['name']}",
-            description=f"Dinosaurus: {player_info['class']}",
+            title=f"Pozice hráče: {player_info.name}",
+            description=f"Dinosaurus: {player_info.dino}",
             color=nextcord.Color.green()
         )
         
         # Přidání polí s informacemi
-        embed.add_field(name="Souřadnice", value=player_info['coords']['formatted'], inline=False)
-        embed.add_field(name="Growth", value=f"{player_info['growth']:.0f}%", inline=True)
-        embed.add_field(name="Health", value=f"{player_info['health']:.0f}%", inline=True)
-        embed.add_field(name="Stamina", value=f"{player_info['stamina']:.0f}%", inline=True)
-        embed.add_field(name="Hunger", value=f"{player_info['hunger']:.0f}%", inline=True)
-        embed.add_field(name="Thirst", value=f"{player_info['thirst']:.0f}%", inline=True)
+        embed.add_field(name="Souřadnice", value=player_info.coords_text, inline=False)
+        embed.add_field(name="Growth", value=f"{player_info.growth:.0f}%", inline=True)
+        embed.add_field(name="Health", value=f"{player_info.health:.0f}%", inline=True)
+        embed.add_field(name="Stamina", value=f"{player_info.stamina:.0f}%", inline=True)
+        embed.add_field(name="Hunger", value=f"{player_info.hunger:.0f}%", inline=True)
+        embed.add_field(name="Thirst", value=f"{player_info.thirst:.0f}%", inline=True)
         
         # Přidání thumbnail a footer
         embed.set_thumbnail(url="https://i.imgur.com/AhI15Pl.png")  # Můžete změnit URL podle potřeby
-        embed.set_footer(text=f"KarelKana.Eu • {player_info['timestamp']}")
+        embed.set_footer(text=f"KarelKana.Eu • {self.data_timestamp}")
         
         return embed
     
-        def create_map_image_with_players(self, selected_player_id=None, crop_area=None):
-            """Vytvoří obrázek mapy s označenými pozicemi hráčů"""
-        if not self.map_image:
-            logging.error("Obrázek mapy není k dispozici")
-            return None
-        
+    async def start_renderer(self):
+        """Nastartuje procesy rendereru s aktuálním obrázkem mapy"""
+        if not self.map_bytes:
+            return
         try:
-            # Vytvoření kopie mapy pro kreslení
-            map_image = self.map_image.copy()
-            draw = ImageDraw.Draw(map_image)
-            
-            # Pokud nejsou žádní hráči, vrátíme prázdnou mapu
-            if not self.player_data:
-                logging.warning("Žádní hráči nejsou online")
-                
-                # Vytvoření BytesIO objektu pro uložení obrázku
-                img_byte_arr = io.BytesIO()
-                map_image.save(img_byte_arr, format='PNG')
-                img_byte_arr.seek(0)
-                return img_byte_arr
-            
-            # Generování barev pro různé třídy dinosaurů
-            dino_colors = {}
-            dino_classes = set(player["class"] for player in self.player_data)
-            
-            # Předefinované barvy pro dinosaury
-            predefined_colors = [
-                (255, 0, 0),     # Červená
-                (0, 0, 255),     # Modrá
-                (0, 255, 0),     # Zelená
-                (255, 255, 0),   # Žlutá
-                (255, 0, 255),   # Purpurová
-                (0, 255, 255),   # Azurová
-                (255, 128, 0),   # Oranžová
-                (128, 0, 255),   # Fialová
-                (0, 128, 255),   # Světle modrá
-                (255, 0, 128),   # Růžová
-                (128, 255, 0),   # Limetková
-                (255, 255, 255), # Bílá
-                (150, 75, 0),    # Hnědá
-                (0, 128, 128),   # Tyrkysová
-                (128, 128, 0),   # Olivová
-                (128, 0, 0)      # Vínová
-            ]
-            
-            # Přiřazení barev třídám dinosaurů
-            for i, dino_class in enumerate(dino_classes):
-                dino_colors[dino_class] = predefined_colors[i % len(predefined_colors)]
-            
-            # Načtení fontu pro popisky
-            try:
-                font_size = 20
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except Exception as font_error:
-                logging.warning(f"Nepodařilo se načíst font: {font_error}")
-                font = ImageFont.load_default()
-            
-            # Vyznačení pozic hráčů na mapě
-            selected_player = None
-            selected_player_pos = None
-            
-            for player in self.player_data:
-                # Transformace herních souřadnic na souřadnice mapy
-                map_coords = self.transform_coordinates(player["coords"]["x"], player["coords"]["y"])
-                
-                # Barva podle třídy dinosaura
-                marker_color = dino_colors.get(player["class"], (255, 255, 255))
-                
-                # Velikost značky
-                marker_size = 10
-                
-                # Pokud je to vybraný hráč, uložíme si jeho pozici a data
-                if player["id"] == selected_player_id:
-                    selected_player = player
-                    selected_player_pos = map_coords
-                    # Vyznačíme ho větší značkou
-                    marker_size = 15
-                
-                # Kreslení značky (kruh)
-                draw.ellipse(
-                    (map_coords["x"] - marker_size, map_coords["y"] - marker_size,
-                     map_coords["x"] + marker_size, map_coords["y"] + marker_size),
-                    fill=marker_color, outline=(255, 255, 255), width=2
-                )
-                
-                # Přidání malého textu se jménem hráče
-                draw.text(
-                    (map_coords["x"] + marker_size + 2, map_coords["y"] - font_size // 2),
-                    player["name"],
-                    fill=(255, 255, 255), font=font
+            await self.renderer.start(self.map_bytes, self.config["overview_size"], self.config["map_raster_dir"])
+            await self.tiles.set_raster(self.renderer.raster)
+            await self.tile_server.start()
+        except Exception as e:
+            logging.error(f"Chyba při spouštění rendereru mapy: {e}", exc_info=True)
+    
+    async def create_map_image_with_players(self, selected_player_id=None, crop_area=None):
+        """Vytvoří obrázek mapy s označenými pozicemi hráčů (výřez kolem vybraného hráče, jinak přehled)"""
+        try:
+            # Při startu bota se mapa může ještě načítat a pool ji dekódovat
+            await asyncio.shield(self.renderer_start)
+            if not self.map_bytes:
+                logging.error("Obrázek mapy není k dispozici")
+                return None
+            if not self.renderer.is_ready():
+                logging.error("Renderer mapy není spuštěný")
+                return None
+            # Stejný pohled na stejná data se renderuje jednou, další kliknutí dostanou hotový obrázek
+            players = self.player_data
+            config = dict(self.config)
+            key = (self.render_version, selected_player_id, crop_area, config["output_format"])
+            
+            async def render():
+                if not players:
+                    logging.warning("Žádní hráči nejsou online")
+                return await self.renderer.render(
+                    players, config, selected_player_id=selected_player_id, crop_area=crop_area
                 )
             
-            # Přidání detailních informací o vybraném hráči
-            if selected_player and selected_player_pos:
-                # Vytvoření rámečku pro informace (info box)
-                info_box_width = 200
-                info_box_height = 150
-                info_box_x = selected_player_pos["x"] + 20
-                info_box_y = selected_player_pos["y"] - 75
-                
-                # Zajištění, aby info box nepřekračoval hranice obrázku
-                if info_box_x + info_box_width > map_image.width:
-                    info_box_x = selected_player_pos["x"] - info_box_width - 20
-                
-                if info_box_y + info_box_height > map_image.height:
-                    info_box_y = map_image.height - info_box_height - 10
-                
-                if info_box_y < 10:
-                    info_box_y = 10
-                
-                # Kreslení pozadí info boxu (poloprůhledný černý obdélník)
-                draw.rectangle(
-                    (info_box_x, info_box_y, info_box_x + info_box_width, info_box_y + info_box_height),
-                    fill=(0, 0, 0, 180), outline=(255, 255, 255), width=2
-                )
-                
-                # Přidání informací o hráči
-                text_x = info_box_x + 10
-                text_y = info_box_y + 10
-                line_height = font_size + 2
-                
-                draw.text((text_x, text_y), f"Hráč: {selected_player['name']}", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Dino: {selected_player['class']}", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Growth: {selected_player['growth']:.0f}%", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Health: {selected_player['health']:.0f}%", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Stamina: {selected_player['stamina']:.0f}%", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Hunger: {selected_player['hunger']:.0f}%", fill=(255, 255, 255), font=font)
-                text_y += line_height
-                
-                draw.text((text_x, text_y), f"Thirst: {selected_player['thirst']:.0f}%", fill=(255, 255, 255), font=font)
-            
-            # Pokud je zadána oblast výřezu, ořežeme mapu
-            if crop_area and selected_player_pos:
-                # Ořezové souřadnice
-                crop_size = crop_area  # velikost čtverce se středem v pozici hráče
-                half_crop = crop_size // 2
-                
-                crop_left = max(0, selected_player_pos["x"] - half_crop)
-                crop_top = max(0, selected_player_pos["y"] - half_crop)
-                crop_right = min(map_image.width, selected_player_pos["x"] + half_crop)
-                crop_bottom = min(map_image.height, selected_player_pos["y"] + half_crop)
-                
-                # Ořez mapy
-                map_image = map_image.crop((crop_left, crop_top, crop_right, crop_bottom))
-            
-            # Vytvoření BytesIO objektu pro uložení obrázku
-            img_byte_arr = io.BytesIO()
-            map_image.save(img_byte_arr, format='PNG')
-            img_byte_arr.seek(0)
-            return img_byte_arr
+            return await self.render_cache.get_or_render(key, render)
             
         except Exception as e:
             logging.error(f"Chyba při vytváření obrázku mapy: {e}", exc_info=True)
-@nextcord.slash_command(description="Zobrazí seznam online hráčů s interaktivními tlačítky")
-async def hraci(self, interaction: nextcord.Interaction, 
-                   filtr: str = nextcord.SlashOption(
-                       name="filtr",
-                       description="Filtrovat hráče podle jména nebo dinosaura",
-                       required=False
-                   )):
+            return None
+    
+    @nextcord.slash_command(description="Zobrazí seznam online hráčů s interaktivními tlačítky")
+    async def hraci(self, interaction: nextcord.Interaction, 
+                       filtr: str = nextcord.SlashOption(
+                           name="filtr",
+                           description="Filtrovat hráče podle jména nebo dinosaura",
+                           required=False
+                       )):
         """Zobrazí seznam online hráčů s interaktivními tlačítky pro zobrazení detailů"""
         await interaction.response.defer(ephemeral=True)
         
@@ -617,7 +303,7 @@ async def hraci(self, interaction: nextcord.Interaction,
             # Filtrace hráčů podle filtru
             filtered_players = self.player_data
             if filtr:
-                filtered_players = [p for p in self.player_data if filtr.lower() in p["name"].lower() or filtr.lower() in p["class"].lower()]
+                filtered_players = [p for p in self.player_data if filtr.lower() in p.name.lower() or filtr.lower() in p.dino.lower()]
                 
                 if not filtered_players:
                     await interaction.followup.send(f"Žádný hráč odpovídající filtru '{filtr}' nebyl nalezen.", ephemeral=True)
@@ -640,13 +326,13 @@ async def hraci(self, interaction: nextcord.Interaction,
             logging.error(f"Chyba při zobrazení seznamu hráčů: {e}", exc_info=True)
             await interaction.followup.send(f"Došlo k chybě při zobrazení seznamu hráčů: {str(e)}", ephemeral=True)
     
-@nextcord.slash_command(description="Zobrazí pozici hráče na mapě")
-async def mapa(self, interaction: nextcord.Interaction, 
-                 steam_id: str = nextcord.SlashOption(
-                     name="steam_id",
-                     description="Steam ID hráče (nepovinné)",
-                     required=False
-                 )):
+    @nextcord.slash_command(description="Zobrazí pozici hráče na mapě")
+    async def mapa(self, interaction: nextcord.Interaction, 
+                     steam_id: str = nextcord.SlashOption(
+                         name="steam_id",
+                         description="Steam ID hráče (nepovinné)",
+                         required=False
+                     )):
         """Zobrazí pozici hráče na mapě"""
         await interaction.response.defer(ephemeral=True)
         
@@ -660,46 +346,34 @@ async def mapa(self, interaction: nextcord.Interaction,
                     await interaction.followup.send("Nemáte propojený účet. Použijte příkaz `/link` pro propojení nebo zadejte Steam ID.", ephemeral=True)
                     return
             
-            # Hledání hráče v aktuálních datech
-            player_info = None
-            for player in self.player_data:
-                if player["id"] == steam_id:
-                    player_info = player
-                    break
+            # Hledání hráče v datech ne starších než interval aktualizace (nebo počkáme na právě běžící snímek)
+            snapshot = await self.refresh_player_data()
+            
+            if snapshot is None or not snapshot.is_online(steam_id):
+                await interaction.followup.send("Hráč není aktuálně online na serveru.", ephemeral=True)
+                return
             
-            # Pokud jsme nenašli hráče v aktuálních datech, zkusíme ho najít pomocí RCON
+            player_info = snapshot.info(steam_id)
             if not player_info:
-                # Zkontrolujeme, zda je hráč online
-                is_online = await self.is_player_online(steam_id)
-                
-                if not is_online:
-                    await interaction.followup.send("Hráč není aktuálně online na serveru.", ephemeral=True)
-                    return
-                
-                # Zkusíme získat informace o hráči
-                players_info = await self.get_player_info_batch([steam_id])
-                if players_info and len(players_info) > 0:
-                    player_info = players_info[0]
-                else:
-                    await interaction.followup.send("Nepodařilo se získat informace o hráči.", ephemeral=True)
-                    return
+                await interaction.followup.send("Nepodařilo se získat informace o hráči.", ephemeral=True)
+                return
             
             # Vytvoření obrázku mapy s označenou pozicí hráče
-            image_bytes = self.create_map_image_with_players(selected_player_id=steam_id, crop_area=2000)
+            image_bytes = await self.create_map_image_with_players(selected_player_id=steam_id, crop_area=2000)
             
             if not image_bytes:
                 await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
                 return
             
             # Vytvoření souboru z obrázku
-            map_file = nextcord.File(image_bytes, filename="player_map.png")
+            map_file = nextcord.File(image_bytes, filename=f"player_map.{self.map_extension}")
             
             # Vytvoření embedu s informacemi
             embed = self.create_location_embed(player_info)
-            embed.set_image(url="attachment://player_map.png")
+            embed.set_image(url=f"attachment://player_map.{self.map_extension}")
             
             # Vytvoření UI pro navigaci mezi hráči
-            view = PlayerNavigationUI(self, player_info["id"])
+            view = PlayerNavigationUI(self, player_info.id)
             
             # Odeslání embedu s mapou a UI
             await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -707,36 +381,49 @@ async def mapa(self, interaction: nextcord.Interaction,
         except Exception as e:
             logging.error(f"Chyba při zobrazení mapy: {e}", exc_info=True)
             await interaction.followup.send(f"Došlo k chybě při zobrazení mapy: {str(e)}", ephemeral=True)
-@nextcord.slash_command(
+    @nextcord.slash_command(
         description="Změní nastavení mapy",
         default_member_permissions=nextcord.Permissions(administrator=True)
     )
-async def mapa_kalibrace(self, interaction: nextcord.Interaction,
-                           game_min_x: float = nextcord.SlashOption(
-                               name="min_x",
-                               description="Minimální X souřadnice v herním světě",
-                               required=False
-                           ),
-                           game_max_x: float = nextcord.SlashOption(
-                               name="max_x",
-                               description="Maximální X souřadnice v herním světě",
-                               required=False
-                           ),
-                           game_min_y: float = nextcord.SlashOption(
-                               name="min_y",
-                               description="Minimální Y souřadnice v herním světě",
-                               required=False
-                           ),
-                           game_max_y: float = nextcord.SlashOption(
-                               name="max_y",
-                               description="Maximální Y souřadnice v herním světě",
-                               required=False
-                           ),
-                           update_interval: int = nextcord.SlashOption(
-                               name="interval",
-                               description="Interval aktualizace dat v sekundách",
-                               required=False
-                           )):
+    async def mapa_kalibrace(self, interaction: nextcord.Interaction,
+                               game_min_x: float = nextcord.SlashOption(
+                                   name="min_x",
+                                   description="Minimální X souřadnice v herním světě",
+                                   required=False
+                               ),
+                               game_max_x: float = nextcord.SlashOption(
+                                   name="max_x",
+                                   description="Maximální X souřadnice v herním světě",
+                                   required=False
+                               ),
+                               game_min_y: float = nextcord.SlashOption(
+                                   name="min_y",
+                                   description="Minimální Y souřadnice v herním světě",
+                                   required=False
+                               ),
+                               game_max_y: float = nextcord.SlashOption(
+                                   name="max_y",
+                                   description="Maximální Y souřadnice v herním světě",
+                                   required=False
+                               ),
+                               update_interval: int = nextcord.SlashOption(
+                                   name="interval",
+                                   description="Maximální stáří dat o hráčích pro mapu v sekundách",
+                                   required=False
+                               ),
+                               output_format: str = nextcord.SlashOption(
+                                   name="format",
+                                   description="Formát obrázků mapy",
+                                   choices=["png", "png8", "webp", "jpeg"],
+                                   required=False
+                               ),
+                               output_quality: int = nextcord.SlashOption(
+                                   name="kvalita",
+                                   description="Kvalita pro webp a jpeg (1-100)",
+                                   min_value=1,
+                                   max_value=100,
+                                   required=False
+                               )):
         """Změní nastavení mapy"""
         await interaction.response.defer(ephemeral=True)
         
@@ -766,11 +453,18 @@ async def mapa_kalibrace(self, interaction: nextcord.Interaction,
                     return
                     
                 self.config["update_interval"] = update_interval
-                # Aktualizace intervalu úlohy
-                self.update_player_data_task.change_interval(seconds=update_interval)
+                changes_made = True
+            
+            if output_format is not None:
+                self.config["output_format"] = output_format
+                changes_made = True
+            
+            if output_quality is not None:
+                self.config["output_quality"] = output_quality
                 changes_made = True
             
             if changes_made:
+                self.invalidate_renders()
                 # Uložení konfigurace
                 if self.save_config():
                     await interaction.followup.send("Nastavení mapy bylo úspěšně aktualizováno.", ephemeral=True)
@@ -789,6 +483,7 @@ async def mapa_kalibrace(self, interaction: nextcord.Interaction,
                 embed.add_field(name="Min Y", value=str(self.config["game_min_y"]), inline=True)
                 embed.add_field(name="Max Y", value=str(self.config["game_max_y"]), inline=True)
                 embed.add_field(name="Interval aktualizace", value=f"{self.config['update_interval']} sekund", inline=True)
+                embed.add_field(name="Formát obrázků", value=f"{self.config['output_format']} (kvalita {self.config['output_quality']})", inline=True)
                 
                 embed.add_field(
                     name="Jak nastavit", 
@@ -802,8 +497,8 @@ async def mapa_kalibrace(self, interaction: nextcord.Interaction,
             logging.error(f"Chyba při aktualizaci nastavení mapy: {e}", exc_info=True)
             await interaction.followup.send(f"Došlo k chybě při aktualizaci nastavení mapy: {str(e)}", ephemeral=True)
     
-@nextcord.slash_command(description="Zobrazí statistiky o online hráčích")
-async def online_statistiky(self, interaction: nextcord.Interaction):
+    @nextcord.slash_command(description="Zobrazí statistiky o online hráčích")
+    async def online_statistiky(self, interaction: nextcord.Interaction):
         """Zobrazí statistiky o online hráčích"""
         await interaction.response.defer(ephemeral=True)
         
@@ -816,7 +511,7 @@ async def online_statistiky(self, interaction: nextcord.Interaction):
             # Počítání hráčů podle druhu dinosaura
             dino_counts = {}
             for player in self.player_data:
-                dino_class = player["class"]
+                dino_class = player.dino
                 if dino_class in dino_counts:
                     dino_counts[dino_class] += 1
                 else:
@@ -838,8 +533,8 @@ async def online_statistiky(self, interaction: nextcord.Interaction):
             
             # Přidání dalších možných statistik (průměrný growth, zdraví atd.)
             if self.player_data:
-                avg_growth = sum(p["growth"] for p in self.player_data) / len(self.player_data)
-                avg_health = sum(p["health"] for p in self.player_data) / len(self.player_data)
+                avg_growth = sum(p.growth for p in self.player_data) / len(self.player_data)
+                avg_health = sum(p.health for p in self.player_data) / len(self.player_data)
                 
                 embed.add_field(name="Průměrný growth", value=f"{avg_growth:.1f}%", inline=True)
                 embed.add_field(name="Průměrné zdraví", value=f"{avg_health:.1f}%", inline=True)
@@ -857,22 +552,28 @@ async def online_statistiky(self, interaction: nextcord.Interaction):
         except Exception as e:
             logging.error(f"Chyba při zobrazení statistik: {e}", exc_info=True)
             await interaction.followup.send(f"Došlo k chybě při zobrazení statistik: {str(e)}", ephemeral=True)
-@nextcord.slash_command(description="Hledá konkrétního hráče na serveru")
-async def najit_hrace(self, interaction: nextcord.Interaction, 
-                         jmeno_hrace: str = nextcord.SlashOption(
-                             name="jmeno", 
-                             description="Jméno nebo část jména hráče",
-                             required=True
-                         )):
+
+    @nextcord.slash_command(description="Hledá konkrétního hráče na serveru")
+    async def najit_hrace(self, interaction: nextcord.Interaction, 
+                             jmeno_hrace: str = nextcord.SlashOption(
+                                 name="jmeno", 
+                                 description="Jméno nebo část jména hráče",
+                                 required=True
+                             )):
         """Hledá konkrétního hráče na serveru podle jména a zobrazí jeho pozici"""
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # Hledání hráče podle jména
-            found_players = []
-            for player in self.player_data:
-                if jmeno_hrace.lower() in player["name"].lower():
-                    found_players.append(player)
+            # Hledání hráče podle začátku jména nebo s jedním překlepem, pak podle části jména
+            players_by_id = {player.id: player for player in self.player_data}
+            found_players = [
+                players_by_id[player_id] for player_id, _ in self.online_index.search(jmeno_hrace, limit=len(players_by_id))
+                if player_id in players_by_id
+            ]
+            found_players += [
+                player for player in self.player_data
+                if jmeno_hrace.lower() in player.name.lower() and player not in found_players
+            ]
             
             if not found_players:
                 await interaction.followup.send(f"Žádný hráč s jménem obsahujícím '{jmeno_hrace}' nebyl nalezen online.", ephemeral=True)
@@ -883,21 +584,21 @@ async def najit_hrace(self, interaction: nextcord.Interaction,
                 player_info = found_players[0]
                 
                 # Vytvoření obrázku mapy s označenou pozicí hráče
-                image_bytes = self.create_map_image_with_players(selected_player_id=player_info["id"], crop_area=2000)
+                image_bytes = await self.create_map_image_with_players(selected_player_id=player_info.id, crop_area=2000)
                 
                 if not image_bytes:
                     await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
                     return
                 
                 # Vytvoření souboru z obrázku
-                map_file = nextcord.File(image_bytes, filename="player_map.png")
+                map_file = nextcord.File(image_bytes, filename=f"player_map.{self.map_extension}")
                 
                 # Vytvoření embedu s informacemi
                 embed = self.create_location_embed(player_info)
-                embed.set_image(url="attachment://player_map.png")
+                embed.set_image(url=f"attachment://player_map.{self.map_extension}")
                 
                 # Vytvoření UI pro navigaci mezi hráči
-                view = PlayerNavigationUI(self, player_info["id"])
+                view = PlayerNavigationUI(self, player_info.id)
                 
                 # Odeslání embedu s mapou
                 await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -921,26 +622,37 @@ async def najit_hrace(self, interaction: nextcord.Interaction,
             logging.error(f"Chyba při hledání hráče: {e}", exc_info=True)
             await interaction.followup.send(f"Došlo k chybě při hledání hráče: {str(e)}", ephemeral=True)
 
-@nextcord.slash_command(description="Zobrazí mapu s pozicemi všech hráčů")
-async def mapa_vsech(self, interaction: nextcord.Interaction):
+    @najit_hrace.on_autocomplete("jmeno_hrace")
+    async def najit_hrace_autocomplete(self, interaction: nextcord.Interaction, jmeno_hrace: str):
+        """Našeptává jména online hráčů"""
+        if not jmeno_hrace:
+            names = sorted(player.name for player in self.player_data)[:25]
+        else:
+            names = self.online_index.suggestions(jmeno_hrace)
+        await interaction.response.send_autocomplete(names)
+
+    @nextcord.slash_command(description="Zobrazí mapu s pozicemi všech hráčů")
+    async def mapa_vsech(self, interaction: nextcord.Interaction):
         """Zobrazí mapu s pozicemi všech hráčů"""
         await interaction.response.defer(ephemeral=True)
         
         try:
+            await self.refresh_player_data()
+            
             # Kontrola, zda jsou k dispozici data
             if not self.player_data:
                 await interaction.followup.send("Momentálně nejsou online žádní hráči.", ephemeral=True)
                 return
             
             # Vytvoření obrázku mapy se všemi hráči
-            image_bytes = self.create_map_image_with_players()
+            image_bytes = await self.create_map_image_with_players()
             
             if not image_bytes:
                 await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
                 return
             
             # Vytvoření souboru z obrázku
-            map_file = nextcord.File(image_bytes, filename="all_players_map.png")
+            map_file = nextcord.File(image_bytes, filename=f"all_players_map.{self.map_extension}")
             
             # Vytvoření embedu s informacemi
             embed = nextcord.Embed(
@@ -949,7 +661,7 @@ async def mapa_vsech(self, interaction: nextcord.Interaction):
                 color=nextcord.Color.blue()
             )
             
-            embed.set_image(url="attachment://all_players_map.png")
+            embed.set_image(url=f"attachment://all_players_map.{self.map_extension}")
             embed.set_footer(text=f"Aktualizováno: {datetime.datetime.now().strftime('%H:%M:%S')}")
             
             # Odeslání embedu s mapou
@@ -986,9 +698,9 @@ class PlayerListUI(nextcord.ui.View):
         for player in page_players:
             options.append(
                 nextcord.SelectOption(
-                    label=f"{player['name']} ({player['class']})"[:100],  # Omezení délky
-                    value=player["id"],
-                    description=f"G: {player['growth']:.0f}% | H: {player['health']:.0f}% | {player['coords']['formatted']}"[:100]
+                    label=f"{player.name} ({player.dino})"[:100],  # Omezení délky
+                    value=player.id,
+                    description=f"G: {player.growth:.0f}% | H: {player.health:.0f}% | {player.coords_text}"[:100]
                 )
             )
         
@@ -1081,7 +793,7 @@ class PlayerListUI(nextcord.ui.View):
         # Hledání hráče v datech
         player_info = None
         for player in self.cog.player_data:
-            if player["id"] == player_id:
+            if player.id == player_id:
                 player_info = player
                 break
         
@@ -1090,21 +802,21 @@ class PlayerListUI(nextcord.ui.View):
             return
         
         # Vytvoření obrázku mapy s označenou pozicí hráče
-        image_bytes = self.cog.create_map_image_with_players(selected_player_id=player_id, crop_area=2000)
+        image_bytes = await self.cog.create_map_image_with_players(selected_player_id=player_id, crop_area=2000)
         
         if not image_bytes:
             await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
             return
         
         # Vytvoření souboru z obrázku
-        map_file = nextcord.File(image_bytes, filename="player_map.png")
+        map_file = nextcord.File(image_bytes, filename=f"player_map.{self.cog.map_extension}")
         
         # Vytvoření embedu s informacemi
         embed = self.cog.create_location_embed(player_info)
-        embed.set_image(url="attachment://player_map.png")
+        embed.set_image(url=f"attachment://player_map.{self.cog.map_extension}")
         
         # Vytvoření UI pro navigaci mezi hráči
-        view = PlayerNavigationUI(self.cog, player_info["id"])
+        view = PlayerNavigationUI(self.cog, player_info.id)
         
         # Odeslání embedu s mapou
         await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -1169,14 +881,14 @@ class PlayerListUI(nextcord.ui.View):
         await interaction.response.defer(ephemeral=True)
         
         # Vytvoření obrázku mapy se všemi hráči
-        image_bytes = self.cog.create_map_image_with_players()
+        image_bytes = await self.cog.create_map_image_with_players()
         
         if not image_bytes:
             await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
             return
         
         # Vytvoření souboru z obrázku
-        map_file = nextcord.File(image_bytes, filename="all_players_map.png")
+        map_file = nextcord.File(image_bytes, filename=f"all_players_map.{self.cog.map_extension}")
         
         # Vytvoření embedu s informacemi
         embed = nextcord.Embed(
@@ -1185,12 +897,12 @@ class PlayerListUI(nextcord.ui.View):
             color=nextcord.Color.blue()
         )
         
-        embed.set_image(url="attachment://all_players_map.png")
+        embed.set_image(url=f"attachment://all_players_map.{self.cog.map_extension}")
         embed.set_footer(text=f"Aktualizováno: {datetime.datetime.now().strftime('%H:%M:%S')}")
         
         # Odeslání embedu s mapou
         await interaction.followup.send(file=map_file, embed=embed, ephemeral=True)
-async def stats_callback(self, interaction):
+    async def stats_callback(self, interaction):
         """Callback pro tlačítko zobrazení statistik"""
         await interaction.response.defer(ephemeral=True)
         
@@ -1215,7 +927,7 @@ class PlayerNavigationUI(nextcord.ui.View):
         current_index = -1
         players = self.cog.player_data
         for i, player in enumerate(players):
-            if player["id"] == self.current_player_id:
+            if player.id == self.current_player_id:
                 current_index = i
                 break
         
@@ -1265,7 +977,7 @@ class PlayerNavigationUI(nextcord.ui.View):
         current_index = -1
         players = self.cog.player_data
         for i, player in enumerate(players):
-            if player["id"] == self.current_player_id:
+            if player.id == self.current_player_id:
                 current_index = i
                 break
         
@@ -1273,21 +985,21 @@ class PlayerNavigationUI(nextcord.ui.View):
             prev_player = players[current_index - 1]
             
             # Vytvoření obrázku mapy s označenou pozicí hráče
-            image_bytes = self.cog.create_map_image_with_players(selected_player_id=prev_player["id"], crop_area=2000)
+            image_bytes = await self.cog.create_map_image_with_players(selected_player_id=prev_player.id, crop_area=2000)
             
             if not image_bytes:
                 await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
                 return
             
             # Vytvoření souboru z obrázku
-            map_file = nextcord.File(image_bytes, filename="player_map.png")
+            map_file = nextcord.File(image_bytes, filename=f"player_map.{self.cog.map_extension}")
             
             # Vytvoření embedu s informacemi
             embed = self.cog.create_location_embed(prev_player)
-            embed.set_image(url="attachment://player_map.png")
+            embed.set_image(url=f"attachment://player_map.{self.cog.map_extension}")
             
             # Vytvoření nového UI s aktualizovaným ID hráče
-            view = PlayerNavigationUI(self.cog, prev_player["id"])
+            view = PlayerNavigationUI(self.cog, prev_player.id)
             
             # Odeslání embedu s mapou
             await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -1300,7 +1012,7 @@ class PlayerNavigationUI(nextcord.ui.View):
         current_index = -1
         players = self.cog.player_data
         for i, player in enumerate(players):
-            if player["id"] == self.current_player_id:
+            if player.id == self.current_player_id:
                 current_index = i
                 break
         
@@ -1308,21 +1020,21 @@ class PlayerNavigationUI(nextcord.ui.View):
             next_player = players[current_index + 1]
             
             # Vytvoření obrázku mapy s označenou pozicí hráče
-            image_bytes = self.cog.create_map_image_with_players(selected_player_id=next_player["id"], crop_area=2000)
+            image_bytes = await self.cog.create_map_image_with_players(selected_player_id=next_player.id, crop_area=2000)
             
             if not image_bytes:
                 await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
                 return
             
             # Vytvoření souboru z obrázku
-            map_file = nextcord.File(image_bytes, filename="player_map.png")
+            map_file = nextcord.File(image_bytes, filename=f"player_map.{self.cog.map_extension}")
             
             # Vytvoření embedu s informacemi
             embed = self.cog.create_location_embed(next_player)
-            embed.set_image(url="attachment://player_map.png")
+            embed.set_image(url=f"attachment://player_map.{self.cog.map_extension}")
             
             # Vytvoření nového UI s aktualizovaným ID hráče
-            view = PlayerNavigationUI(self.cog, next_player["id"])
+            view = PlayerNavigationUI(self.cog, next_player.id)
             
             # Odeslání embedu s mapou
             await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -1332,14 +1044,14 @@ class PlayerNavigationUI(nextcord.ui.View):
         await interaction.response.defer(ephemeral=True)
         
         # Vytvoření obrázku mapy se všemi hráči
-        image_bytes = self.cog.create_map_image_with_players()
+        image_bytes = await self.cog.create_map_image_with_players()
         
         if not image_bytes:
             await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
             return
         
         # Vytvoření souboru z obrázku
-        map_file = nextcord.File(image_bytes, filename="all_players_map.png")
+        map_file = nextcord.File(image_bytes, filename=f"all_players_map.{self.cog.map_extension}")
         
         # Vytvoření embedu s informacemi
         embed = nextcord.Embed(
@@ -1348,7 +1060,7 @@ class PlayerNavigationUI(nextcord.ui.View):
             color=nextcord.Color.blue()
         )
         
-        embed.set_image(url="attachment://all_players_map.png")
+        embed.set_image(url=f"attachment://all_players_map.{self.cog.map_extension}")
         embed.set_footer(text=f"Aktualizováno: {datetime.datetime.now().strftime('%H:%M:%S')}")
         
         # Odeslání embedu s mapou
@@ -1372,16 +1084,16 @@ class SearchResultsUI(nextcord.ui.View):
         
         # Přidání select menu pro výběr hráče
         self.add_select_menu()
-def add_select_menu(self):
+    def add_select_menu(self):
         """Přidá select menu pro výběr hráče z výsledků vyhledávání"""
         # Vytvoření options pro select menu (max. 25 položek)
         options = []
         for player in self.players[:25]:  # Discord limit 25 options
             options.append(
                 nextcord.SelectOption(
-                    label=f"{player['name']} ({player['class']})"[:100],  # Omezení délky
-                    value=player["id"],
-                    description=f"G: {player['growth']:.0f}% | H: {player['health']:.0f}% | {player['coords']['formatted']}"[:100]
+                    label=f"{player.name} ({player.dino})"[:100],  # Omezení délky
+                    value=player.id,
+                    description=f"G: {player.growth:.0f}% | H: {player.health:.0f}% | {player.coords_text}"[:100]
                 )
             )
         
@@ -1397,7 +1109,7 @@ def add_select_menu(self):
         # Přidání select menu do view
         self.add_item(select)
     
-async def select_callback(self, interaction):
+    async def select_callback(self, interaction):
         """Callback pro výběr hráče ze select menu"""
         await interaction.response.defer(ephemeral=True)
         
@@ -1407,7 +1119,7 @@ async def select_callback(self, interaction):
         # Hledání hráče v datech
         player_info = None
         for player in self.cog.player_data:
-            if player["id"] == player_id:
+            if player.id == player_id:
                 player_info = player
                 break
         
@@ -1416,21 +1128,21 @@ async def select_callback(self, interaction):
             return
         
         # Vytvoření obrázku mapy s označenou pozicí hráče
-        image_bytes = self.cog.create_map_image_with_players(selected_player_id=player_id, crop_area=2000)
+        image_bytes = await self.cog.create_map_image_with_players(selected_player_id=player_id, crop_area=2000)
         
         if not image_bytes:
             await interaction.followup.send("Nepodařilo se vytvořit obrázek mapy.", ephemeral=True)
             return
         
         # Vytvoření souboru z obrázku
-        map_file = nextcord.File(image_bytes, filename="player_map.png")
+        map_file = nextcord.File(image_bytes, filename=f"player_map.{self.cog.map_extension}")
         
         # Vytvoření embedu s informacemi
         embed = self.cog.create_location_embed(player_info)
-        embed.set_image(url="attachment://player_map.png")
+        embed.set_image(url=f"attachment://player_map.{self.cog.map_extension}")
         
         # Vytvoření UI pro navigaci mezi hráči
-        view = PlayerNavigationUI(self.cog, player_info["id"])
+        view = PlayerNavigationUI(self.cog, player_info.id)
         
         # Odeslání embedu s mapou
         await interaction.followup.send(file=map_file, embed=embed, view=view, ephemeral=True)
@@ -1496,7 +1208,7 @@ class DinoStatisticsUI(nextcord.ui.View):
         if selected_dino == "all":
             filtered_players = self.cog.player_data
         else:
-            filtered_players = [p for p in self.cog.player_data if p["class"] == selected_dino]
+            filtered_players = [p for p in self.cog.player_data if p.dino == selected_dino]
         
         # Kontrola, zda jsou k dispozici hráči
         if not filtered_players:
@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Tělo řádku (vše za "[timestamp][Kategorie]: ") pro jednotlivé kategorie
+KILL_PATTERN = re.compile(
+    r'\s*(?P<killer>.*?)\s+\[(?P<killer_id>\d+)\]\s+Dino:\s+(?P<killer_dino>.*?),\s+'
+    r'(?P<killer_gender>Male|Female),\s+(?P<killer_growth>[\d\.]+)\s+-\s+'
+    r'(?:(?P<natural>Died from Natural cause)'
+    r'|Killed\s+the\s+following\s+player:\s+(?P<victim>.*?),\s+\[(?P<victim_id>\d+)\],\s+'
+    r'Dino:\s+(?P<victim_dino>.*?),\s+Gender:\s+(?P<victim_gender>Male|Female),\s+'
+    r'Growth:\s+(?P<victim_growth>[\d\.]+)(?:,.*)?)$'
+)
+CHAT_PATTERN = re.compile(
+    r'\[(?P<channel>.*?)\] \[(?P<group>.*?)\] (?P<player>.*?) '
+    r'\[(?P<steam_id>\d+)\]: (?P<message>.*)$'
+)
+ADMIN_COMMAND_PATTERN = re.compile(
+    r'(?P<admin>.*?) \[(?P<steam_id>\d+)\] used command: (?P<command>.*?)'
+    r'(?: at: (?P<target>.*?), \[(?P<target_id>\d+)\], Class: (?P<target_class>.*?), '
+    r'Gender: (?P<target_gender>.*?), Previous value: (?P<prev_value>.*?%), New value: (?P<new_value>.*?%))?$'
+)
+JOIN_PATTERN = re.compile(r'(?P<player>\w+) \[(?P<steam_id>\d+)\]')
+CONNECT_PATTERN = re.compile(r'\[Player Connecting .. Steam_Id: (?P<steam_id>\d+)\s*,\s*EOS_Id: (?P<eos_id>\w+)\]')
+
+@dataclass
+class KillEvent:
+    timestamp: str
+    killer: str
+    killer_id: str
+    killer_dino: str
+    killer_gender: str
+    killer_growth: str
+    natural: bool
+    victim: Optional[str] = None
+    victim_id: Optional[str] = None
+    victim_dino: Optional[str] = None
+    victim_gender: Optional[str] = None
+    victim_growth: Optional[str] = None
+
+@dataclass
+class ChatEvent:
+    timestamp: str
+    channel: str
+    group: str
+    player: str
+    steam_id: str
+    message: str
+
+@dataclass
+class AdminCommandEvent:
+    timestamp: str
+    admin: str
+    steam_id: str
+    command: str
+    target: Optional[str] = None
+    target_id: Optional[str] = None
+    target_class: Optional[str] = None
+    target_gender: Optional[str] = None
+    prev_value: Optional[str] = None
+    new_value: Optional[str] = None
+
+@dataclass
+class JoinEvent:
+    timestamp: str
+    player: str
+    steam_id: str
+
+@dataclass
+class ConnectEvent:
+    timestamp: str
+    steam_id: str
+    eos_id: str
+
+def parse_kill(timestamp, body):
+    match = KILL_PATTERN.match(body)
+    if not match:
+        return None
+    return KillEvent(timestamp=timestamp, natural=match.group("natural") is not None,
+                     **{k: v for k, v in match.groupdict().items() if k != "natural"})
+
+def parse_chat(timestamp, body):
+    match = CHAT_PATTERN.match(body)
+    return ChatEvent(timestamp=timestamp, **match.groupdict()) if match else None
+
+def parse_admin_command(timestamp, body):
+    match = ADMIN_COMMAND_PATTERN.match(body)
+    return AdminCommandEvent(timestamp=timestamp, **match.groupdict()) if match else None
+
+def parse_join(timestamp, body):
+    match = JOIN_PATTERN.match(body)
+    return JoinEvent(timestamp=timestamp, **match.groupdict()) if match else None
+
+def parse_connect(timestamp, body):
+    match = CONNECT_PATTERN.match(body)
+    return ConnectEvent(timestamp=timestamp, **match.groupdict()) if match else None
+
+# Kategorie logu -> parser těla řádku
+PARSERS = {
+    "LogTheIsleKillData": parse_kill,
+    "LogTheIsleChatData": parse_chat,
+    "LogTheIsleCommandData": parse_admin_command,
+    "LogTheIsleJoinData": parse_join,
+    "LogTheIsleServer": parse_connect,
+}
+
+def split_line(line):
+    """Rozdělí řádek '[timestamp][Kategorie]: tělo' bez regexu, vrací (timestamp, kategorie, tělo)"""
+    if not line.startswith("["):
+        return None
+    timestamp_end = line.find("][", 1)
+    if timestamp_end < 0:
+        return None
+    category_end = line.find("]:", timestamp_end + 2)
+    if category_end < 0:
+        return None
+    return line[1:timestamp_end], line[timestamp_end + 2:category_end], line[category_end + 2:].lstrip(" ")
+
+def parse_line(line, categories=None):
+    """
+    Přečte kategorii řádku jednou a spustí jen parser dané kategorie.
+    Vrací (kategorie, událost), nebo None pro nezajímavé či nerozpoznané řádky.
+    """
+    parts = split_line(line.rstrip("\r\n"))
+    if parts is None:
+        return None
+    timestamp, category, body = parts
+    if categories is not None and category not in categories:
+        return None
+    parser = PARSERS.get(category)
+    if parser is None:
+        return None
+    event = parser(timestamp, body)
+    return (category, event) if event is not None else None
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta
+from nextcord.ext import tasks
+from util.config import FILE_PATH, LOG_COLD_START, LOG_BACKFILL_BYTES, LOG_BACKFILL_MINUTES
+from util.config import LOG_READ_CHUNK, LOG_DISPATCH_BATCH, LOG_POLL_MIN, LOG_POLL_MAX, LOG_POLL_DECAY
+from util.sftppool import get_sftp_pool
+from util.checkpoint import CheckpointStore, FINGERPRINT_BYTES, is_same_file
+from util.logevents import parse_line
+
+TIMESTAMP_PATTERN = re.compile(rb'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2})\]')
+
+class LogTail:
+    """
+    Sdílené čtení herního logu přes SFTP.
+    Nové bajty se stáhnou jednou za tick po blocích s omezenou velikostí, každý řádek se jednou
+    rozparsuje na událost (util.logevents) a události se rozešlou odběratelům podle kategorie.
+    Interval čtení se přizpůsobuje růstu logu: při nových řádcích klesne na LOG_POLL_MIN,
+    v klidu se násobí LOG_POLL_DECAY až do LOG_POLL_MAX.
+    """
+    def __init__(self, bot, filepath=FILE_PATH):
+        self.bot = bot
+        self.sftp = get_sftp_pool()
+        self.filepath = filepath
+        self.checkpoints = CheckpointStore()
+        self.subscribers = []
+        self.poll_lock = asyncio.Lock()
+        self.interval = LOG_POLL_MIN
+
+    def subscribe(self, categories, handler):
+        """Zaregistruje async handler(events) pro jednu nebo více kategorií logu"""
+        if isinstance(categories, str):
+            categories = [categories]
+        self.subscribers.append((frozenset(categories), handler))
+        if not self.tail_log.is_running():
+            self.tail_log.start()
+
+    def unsubscribe(self, handler):
+        """Odebere handler, po odchodu posledního odběratele zastaví čtení"""
+        self.subscribers = [(cats, h) for cats, h in self.subscribers if h != handler]
+        if not self.subscribers and self.tail_log.is_running():
+            self.tail_log.cancel()
+
+    async def cold_start_offset(self, size):
+        """Offset, od kterého se čte log bez uloženého checkpointu (LOG_COLD_START)"""
+        if LOG_COLD_START not in ("bytes", "minutes"):
+            return size
+        window = min(size, LOG_BACKFILL_BYTES)
+        start = size - window
+        data = await self.sftp.read_range(self.filepath, start, window)
+        if LOG_COLD_START == "bytes":
+            if start == 0:
+                return 0
+            newline = data.find(b"\n")
+            return size if newline < 0 else start + newline + 1
+        # "minutes": posledních N minut podle časových značek v logu, nejvýše LOG_BACKFILL_BYTES
+        line_starts = []
+        position = 0 if start == 0 else data.find(b"\n") + 1
+        if start > 0 and position == 0:
+            return size
+        while position < len(data):
+            match = TIMESTAMP_PATTERN.match(data, position)
+            if match:
+                line_starts.append((start + position, datetime.strptime(match.group(1).decode(), "%Y.%m.%d-%H.%M.%S")))
+            newline = data.find(b"\n", position)
+            if newline < 0:
+                break
+            position = newline + 1
+        if not line_starts:
+            return size
+        cutoff = line_starts[-1][1] - timedelta(minutes=LOG_BACKFILL_MINUTES)
+        return next(offset for offset, timestamp in line_starts if timestamp >= cutoff)
+
+    async def plan_read(self):
+        """
+        Jeden stat a první čtení od uložené pozice spolu s otiskem začátku souboru.
+        Vrací (offset, velikost, mtime, hlavička, první blok), případně None, pokud se soubor nezměnil.
+        """
+        current_stat = await self.sftp.stat(self.filepath)
+        size, mtime = current_stat.st_size, current_stat.st_mtime
+        checkpoint = self.checkpoints.get(self.filepath)
+        if checkpoint is None:
+            offset = await self.cold_start_offset(size)
+            logging.info(f"No checkpoint for {self.filepath}, cold start ({LOG_COLD_START}) at offset {offset}")
+        elif size == checkpoint["size"] and mtime == checkpoint["mtime"]:
+            return None
+        else:
+            offset = checkpoint["offset"]
+        header, first_chunk = await self.sftp.read_ranges(
+            self.filepath, [(0, min(size, FINGERPRINT_BYTES)), (offset, max(0, min(LOG_READ_CHUNK, size - offset)))]
+        )
+        if checkpoint is not None and (size < offset or not is_same_file(checkpoint, header)):
+            logging.info(f"Log rotation detected for {self.filepath}, reading new file from the start")
+            offset = 0
+            first_chunk = None
+        return offset, size, mtime, header, first_chunk
+
+    async def iter_lines(self, offset, end, first_chunk=None):
+        """
+        Async generátor úplných řádků mezi offset a end, stahovaných po blocích LOG_READ_CHUNK.
+        Vrací (řádek, offset za řádkem); nedokončený poslední řádek se nevrací a přečte se při dalším ticku.
+        Řádky se oddělují ještě v bajtech - \n se v UTF-8 nevyskytuje uvnitř vícebajtového znaku,
+        takže znak rozdělený mezi dva bloky zůstane celý v přeneseném zbytku.
+        """
+        position = offset
+        pending = b""
+        while position < end:
+            if first_chunk:
+                chunk, first_chunk = first_chunk, None
+            else:
+                chunk = await self.sftp.read_range(self.filepath, position, min(LOG_READ_CHUNK, end - position))
+            if not chunk:
+                break
+            line_end = position - len(pending)
+            position += len(chunk)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for raw_line in lines:
+                line_end += len(raw_line) + 1
+                yield raw_line.decode("utf-8", errors="replace"), line_end
+
+    async def dispatch(self, parsed):
+        """Rozešle rozparsované (kategorie, událost) odběratelům"""
+        for categories, handler in list(self.subscribers):
+            events = [event for category, event in parsed if category in categories]
+            if not events:
+                continue
+            try:
+                await handler(events)
+            except Exception as e:
+                logging.error(f"Error in log subscriber {getattr(handler, '__qualname__', handler)}: {e}")
+
+    def adapt_interval(self, grew):
+        """Zkrátí interval při růstu logu, jinak ho postupně prodlužuje"""
+        if grew:
+            interval = LOG_POLL_MIN
+        else:
+            interval = min(LOG_POLL_MAX, self.interval * LOG_POLL_DECAY)
+        if interval != self.interval:
+            self.interval = interval
+            self.tail_log.change_interval(seconds=interval)
+
+    async def poll(self):
+        """Stáhne nový obsah logu po blocích a průběžně předává události odběratelům"""
+        async with self.poll_lock:
+            try:
+                plan = await self.plan_read()
+            except Exception as e:
+                logging.error(f"SFTP operation error: {e}")
+                self.adapt_interval(False)
+                return False
+            if plan is None:
+                # Stat beze změny velikosti a mtime, nic se nečte
+                self.adapt_interval(False)
+                return True
+            offset, size, mtime, header, first_chunk = plan
+            wanted = frozenset().union(*(categories for categories, _ in self.subscribers))
+            parsed = []
+            position = offset
+            complete = True
+            try:
+                async for line, line_end in self.iter_lines(offset, size, first_chunk):
+                    event = parse_line(line, wanted)
+                    if event is not None:
+                        parsed.append(event)
+                    position = line_end
+                    if len(parsed) >= LOG_DISPATCH_BATCH:
+                        await self.dispatch(parsed)
+                        parsed = []
+                        # Velikost None vynutí dočtení zbytku i při nezměněném souboru
+                        self.checkpoints.set(self.filepath, position, None, mtime, header)
+            except Exception as e:
+                logging.error(f"SFTP operation error: {e}")
+                complete = False
+            if parsed:
+                await self.dispatch(parsed)
+            self.adapt_interval(position > offset)
+            self.checkpoints.set(self.filepath, position, size if complete else None, mtime, header)
+            return complete
+
+    @tasks.loop(seconds=LOG_POLL_MIN)
+    async def tail_log(self):
+        try:
+            await self.poll()
+        except Exception as e:
+            logging.error(f"Error in tail_log loop: {e}")
+
+    @tail_log.before_loop
+    async def before_tail_log(self):
+        await self.bot.wait_until_ready()
+
+def get_log_tail(bot):
+    """Vrátí sdílenou instanci LogTail pro daného bota"""
+    if not hasattr(bot, "log_tail"):
+        bot.log_tail = LogTail(bot)
+    return bot.log_tail
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import logging
+import os
+import aiohttp
+
+DOWNLOAD_TIMEOUT = 60
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _write_file(path, data):
+    # Zápis přes dočasný soubor, aby po pádu nezůstal v cache useknutý obrázek
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class MapImageCache:
+    """
+    Obrázek mapy v lokální cache na disku s podmíněnou revalidací (ETag / Last-Modified).
+    Při startu se hned použije kopie z disku (nebo mapa přibalená k webu), stažení a kontrola
+    novější verze běží na pozadí a nikdy neblokuje event loop.
+    """
+    def __init__(self, url, cache_file, fallback_file):
+        self.url = url
+        self.cache_file = cache_file
+        self.meta_file = cache_file + ".json"
+        self.fallback_file = fallback_file
+        self.source = None
+
+    def load_meta(self):
+        try:
+            with open(self.meta_file, 'r') as f:
+                meta = json.load(f)
+            # Validátory platí jen pro URL, ze které byla kopie stažena
+            return meta if meta.get("url") == self.url else {}
+        except (OSError, ValueError):
+            return {}
+
+    async def load_local(self):
+        """Obrázek z cache, jinak přibalený záložní soubor, jinak None"""
+        loop = asyncio.get_event_loop()
+        for path, source in ((self.cache_file, "cache"), (self.fallback_file, "fallback")):
+            if path and os.path.exists(path):
+                try:
+                    data = await loop.run_in_executor(None, _read_file, path)
+                except OSError as e:
+                    logging.error(f"Chyba při čtení obrázku mapy {path}: {e}")
+                    continue
+                self.source = source
+                logging.info(f"Obrázek mapy načten z {path}")
+                return data
+        return None
+
+    async def revalidate(self):
+        """
+        Zeptá se serveru na novější verzi. Vrátí nový obrázek (uložený do cache),
+        nebo None, pokud se nezměnil nebo stažení selhalo.
+        """
+        if not self.url:
+            return None
+        # Záložní mapa není kopie ze serveru, bez validátorů se stáhne celá
+        meta = self.load_meta() if self.source in ("cache", "download") else {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            timeout = aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(self.url, headers=headers) as response:
+                    if response.status == 304:
+                        logging.info("Obrázek mapy v cache je aktuální")
+                        return None
+                    if response.status != 200:
+                        logging.error(f"Nepodařilo se stáhnout obrázek mapy: Status {response.status}")
+                        return None
+                    data = await response.read()
+                    meta = {
+                        "url": self.url,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+        except Exception as e:
+            logging.error(f"Chyba při stahování obrázku mapy: {e}")
+            return None
+
+        loop = asyncio.get_event_loop()
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            await loop.run_in_executor(None, _write_file, self.cache_file, data)
+            with open(self.meta_file, 'w') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            logging.error(f"Chyba při ukládání obrázku mapy do cache: {e}")
+        self.source = "download"
+        logging.info(f"Obrázek mapy úspěšně stažen z {self.url} ({len(data)} B)")
+        return data
@@ -0,0 +1,91 @@
+import glob
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+from PIL import Image
+
+RASTER_MODE = "RGBA"
+# Úroveň 0 je plné rozlišení, každá další má poloviční šířku i výšku
+RASTER_LEVELS = 4
+# Zápis po pruzích řádků, aby se celá mapa při převodu nedržela v paměti dvakrát
+WRITE_ROWS = 512
+
+def _level_path(directory, digest, level):
+    return os.path.join(directory, f"worldmap-{digest}-{level}.rgba")
+
+def _write_level(image, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        for top in range(0, image.height, WRITE_ROWS):
+            f.write(image.crop((0, top, image.width, min(image.height, top + WRITE_ROWS))).tobytes())
+    os.replace(tmp_path, path)
+
+def _valid(meta):
+    return all(
+        os.path.exists(level["path"]) and os.path.getsize(level["path"]) == level["width"] * level["height"] * 4
+        for level in meta["levels"]
+    )
+
+def build_raster(map_bytes, directory):
+    """
+    Dekóduje PNG mapy jednou do syrových RGBA souborů (plné rozlišení + zmenšeniny).
+    Soubory jsou pojmenované podle hashe PNG, takže po restartu se stejnou mapou se nic
+    nedekóduje. Vrací popis {"digest", "levels": [{"path", "width", "height"}]}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha1(map_bytes).hexdigest()[:16]
+    meta_path = os.path.join(directory, f"worldmap-{digest}.json")
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if _valid(meta):
+            return meta
+    except (OSError, ValueError, KeyError):
+        pass
+
+    image = Image.open(io.BytesIO(map_bytes)).convert(RASTER_MODE)
+    levels = []
+    for level in range(RASTER_LEVELS):
+        if level:
+            if min(image.size) < 2:
+                break
+            image = image.reduce(2)
+        path = _level_path(directory, digest, level)
+        _write_level(image, path)
+        levels.append({"path": path, "width": image.width, "height": image.height})
+    meta = {"digest": digest, "levels": levels}
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+    # Rastry předchozích verzí mapy už nejsou potřeba
+    for path in glob.glob(os.path.join(directory, "worldmap-*")):
+        if digest not in os.path.basename(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    logging.info(f"Map raster {digest} built with {len(levels)} levels in {directory}")
+    return meta
+
+def open_level(level):
+    """
+    Úroveň rastru jako Image nad mmap souboru, bez kopírování. Stránky se načítají,
+    až když je čte výřez, a procesy se stejným souborem sdílí page cache.
+    """
+    with open(level["path"], 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return Image.frombuffer(RASTER_MODE, (level["width"], level["height"]), buffer, "raw", RASTER_MODE, 0, 1)
+
+def open_raster(meta):
+    return [open_level(level) for level in meta["levels"]]
+
+def pick_level(levels, width):
+    """Nejmenší úroveň, která je aspoň tak široká jako požadovaná šířka"""
+    for image in reversed(levels):
+        if image.width >= width:
+            return image
+    return levels[0]
@@ -0,0 +1,366 @@
+import asyncio
+import io
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+from util.config import MAP_RENDER_WORKERS, MAP_RENDER_CONCURRENCY, MAP_RENDER_CACHE_BYTES
+from util.mapraster import build_raster, open_raster, pick_level
+
+FONT_SIZE = 20
+MARKER_SIZE = 10
+SELECTED_MARKER_SIZE = 15
+# Jak daleko za okraj výřezu ještě může ležet značka, jejíž popisek do výřezu zasahuje
+LABEL_MARGIN = 300
+INFO_BOX_WIDTH = 200
+INFO_BOX_HEIGHT = 150
+
+# Předefinované barvy pro dinosaury
+PREDEFINED_COLORS = [
+    (255, 0, 0),     # Červená
+    (0, 0, 255),     # Modrá
+    (0, 255, 0),     # Zelená
+    (255, 255, 0),   # Žlutá
+    (255, 0, 255),   # Purpurová
+    (0, 255, 255),   # Azurová
+    (255, 128, 0),   # Oranžová
+    (128, 0, 255),   # Fialová
+    (0, 128, 255),   # Světle modrá
+    (255, 0, 128),   # Růžová
+    (128, 255, 0),   # Limetková
+    (255, 255, 255), # Bílá
+    (150, 75, 0),    # Hnědá
+    (0, 128, 128),   # Tyrkysová
+    (128, 128, 0),   # Olivová
+    (128, 0, 0)      # Vínová
+]
+
+@lru_cache(maxsize=1)
+def load_font():
+    try:
+        return ImageFont.truetype("arial.ttf", FONT_SIZE)
+    except Exception as font_error:
+        logging.warning(f"Nepodařilo se načíst font: {font_error}")
+        return ImageFont.load_default()
+
+def transform_coordinates(game_x, game_y, config):
+    """Převede herní souřadnice na pixely celé mapy (s invertováním Y)"""
+    norm_x = (float(game_x) - config["game_min_x"]) / (config["game_max_x"] - config["game_min_x"])
+    norm_y = (float(game_y) - config["game_min_y"]) / (config["game_max_y"] - config["game_min_y"])
+    map_size = config["map_size"]
+    return int(norm_x * map_size), int((1 - norm_y) * map_size)
+
+def dino_colors(players):
+    """Barva pro každou třídu dinosaura; seřazené třídy, aby barvy nebyly mezi rendery náhodné"""
+    classes = sorted(set(player.dino for player in players))
+    return {dino: PREDEFINED_COLORS[i % len(PREDEFINED_COLORS)] for i, dino in enumerate(classes)}
+
+def make_overview(base, size):
+    """Zmenšená celá mapa pro přehled všech hráčů, počítá se jednou při startu workeru"""
+    if base.width <= size:
+        return base
+    return base.resize((size, round(base.height * size / base.width)), Image.LANCZOS, reducing_gap=3.0)
+
+def draw_players(image, players, config, left, top, scale, selected_player_id=None):
+    """
+    Nakreslí značky hráčů, kteří leží v obrázku (nebo jejich popisek do něj zasahuje).
+    left/top je poloha obrázku na celé mapě, scale poměr pixelů obrázku k pixelům celé mapy.
+    Vrátí pozici vybraného hráče v obrázku, nebo None.
+    """
+    draw = ImageDraw.Draw(image)
+    font = load_font()
+    colors = dino_colors(players)
+    selected_pos = None
+    for player in players:
+        map_x, map_y = transform_coordinates(player.x, player.y, config)
+        x = int((map_x - left) * scale)
+        y = int((map_y - top) * scale)
+        if not (-LABEL_MARGIN <= x <= image.width + MARKER_SIZE and -MARKER_SIZE <= y <= image.height + FONT_SIZE):
+            continue
+        marker_size = MARKER_SIZE
+        if player.id == selected_player_id:
+            selected_pos = (x, y)
+            marker_size = SELECTED_MARKER_SIZE
+        draw.ellipse(
+            (x - marker_size, y - marker_size, x + marker_size, y + marker_size),
+            fill=colors.get(player.dino, (255, 255, 255)), outline=(255, 255, 255), width=2
+        )
+        draw.text((x + marker_size + 2, y - FONT_SIZE // 2), player.name, fill=(255, 255, 255), font=font)
+    return selected_pos
+
+def draw_info_box(image, player, pos):
+    """Rámeček s podrobnostmi o vybraném hráči vedle jeho značky"""
+    draw = ImageDraw.Draw(image)
+    font = load_font()
+    box_x = pos[0] + 20
+    box_y = pos[1] - 75
+    # Zajištění, aby info box nepřekračoval hranice obrázku
+    if box_x + INFO_BOX_WIDTH > image.width:
+        box_x = pos[0] - INFO_BOX_WIDTH - 20
+    if box_y + INFO_BOX_HEIGHT > image.height:
+        box_y = image.height - INFO_BOX_HEIGHT - 10
+    if box_y < 10:
+        box_y = 10
+    draw.rectangle(
+        (box_x, box_y, box_x + INFO_BOX_WIDTH, box_y + INFO_BOX_HEIGHT),
+        fill=(0, 0, 0, 180), outline=(255, 255, 255), width=2
+    )
+    lines = [
+        f"Hráč: {player.name}",
+        f"Dino: {player.dino}",
+        f"Growth: {player.growth:.0f}%",
+        f"Health: {player.health:.0f}%",
+        f"Stamina: {player.stamina:.0f}%",
+        f"Hunger: {player.hunger:.0f}%",
+        f"Thirst: {player.thirst:.0f}%",
+    ]
+    for i, line in enumerate(lines):
+        draw.text((box_x + 10, box_y + 10 + i * (FONT_SIZE + 2)), line, fill=(255, 255, 255), font=font)
+
+def render_viewport(base, players, config, selected_player_id, crop_size):
+    """
+    Výřez crop_size × crop_size kolem vybraného hráče. Nejdřív se vyřízne podklad
+    a kreslí se jen hráči ve výřezu, celá mapa se nikdy nekopíruje.
+    Vrátí None, pokud vybraný hráč v datech není.
+    """
+    selected = next((player for player in players if player.id == selected_player_id), None)
+    if selected is None:
+        return None
+    # Podklad nemusí mít plné rozlišení map_size (záložní mapa), výřez se škáluje s ním
+    scale = base.width / config["map_size"]
+    map_x, map_y = transform_coordinates(selected.x, selected.y, config)
+    base_x, base_y = int(map_x * scale), int(map_y * scale)
+    half_crop = int(crop_size * scale) // 2
+    box = (
+        max(0, base_x - half_crop), max(0, base_y - half_crop),
+        min(base.width, base_x + half_crop), min(base.height, base_y + half_crop)
+    )
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    # Výřez z mmap rastru je jediná kopie pixelů; RGB kvůli neprůhlednému info boxu jako dřív
+    image = base.crop(box).convert("RGB")
+    left, top = box[0] / scale, box[1] / scale
+    if scale < 1:
+        # Menší podklad se zvětší na požadovaný výřez, jinak by značky, písmo a info box
+        # v plné velikosti zakryly většinu obrázku
+        image = image.resize((round(image.width / scale), round(image.height / scale)), Image.BICUBIC)
+        scale = 1
+    pos = draw_players(image, players, config, left, top, scale, selected_player_id)
+    if pos:
+        draw_info_box(image, selected, pos)
+    return image
+
+def render_overview(overview, players, config, selected_player_id=None):
+    """Celá mapa ve zmenšeném rozlišení se všemi hráči"""
+    image = overview.convert("RGB")
+    pos = draw_players(image, players, config, 0, 0, image.width / config["map_size"], selected_player_id)
+    if pos:
+        selected = next(player for player in players if player.id == selected_player_id)
+        draw_info_box(image, selected, pos)
+    return image
+
+def render_map(base, overview, players, config, selected_player_id=None, crop_area=None):
+    """Výřez kolem vybraného hráče, nebo (bez výřezu či bez hráče) přehled celé mapy"""
+    image = None
+    if crop_area and selected_player_id:
+        image = render_viewport(base, players, config, selected_player_id, crop_area)
+    if image is None:
+        image = render_overview(overview, players, config, selected_player_id)
+    return image
+
+# Formát výstupu -> přípona souboru v příloze Discordu
+OUTPUT_EXTENSIONS = {"png": "png", "png8": "png", "webp": "webp", "jpeg": "jpg"}
+# Nastavení enkodérů laděná na rychlost, ne na nejmenší soubor
+PNG_COMPRESS_LEVEL = 3
+WEBP_METHOD = 2
+# Kolikrát se obrázek při překročení limitu bajtů zmenší a zakóduje znovu
+ENCODE_ATTEMPTS = 3
+
+def output_extension(output_format):
+    return OUTPUT_EXTENSIONS.get(output_format, "png")
+
+def _encode(image, output_format, quality):
+    buffer = io.BytesIO()
+    if output_format == "webp":
+        image.save(buffer, format='WEBP', quality=quality, method=WEBP_METHOD)
+    elif output_format == "jpeg":
+        image.save(buffer, format='JPEG', quality=quality)
+    elif output_format == "png8":
+        # Paleta 256 barev: mapa s barevnými značkami to snese a PNG je několikrát menší
+        image.quantize(colors=256, method=Image.FASTOCTREE).save(
+            buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL
+        )
+    else:
+        image.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+def _resize(image, scale):
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    return image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+
+def encode_image(image, config):
+    """
+    Zakóduje obrázek podle output_format / output_quality z konfigurace mapy.
+    Větší obrázek než output_max_pixels se předem zmenší; když výsledek přesáhne
+    output_max_bytes (limit příloh Discordu), zmenší se podle poměru velikostí a zkusí znovu.
+    """
+    output_format = config.get("output_format", "png")
+    quality = int(config.get("output_quality", 80))
+    max_pixels = config.get("output_max_pixels")
+    max_bytes = config.get("output_max_bytes")
+    if max_pixels and image.width * image.height > max_pixels:
+        image = _resize(image, (max_pixels / (image.width * image.height)) ** 0.5)
+    data = _encode(image, output_format, quality)
+    for _ in range(ENCODE_ATTEMPTS):
+        if not max_bytes or len(data) <= max_bytes:
+            break
+        logging.warning(f"Obrázek mapy má {len(data)} B (limit {max_bytes} B), zmenšuji {image.width}x{image.height}")
+        image = _resize(image, (max_bytes / len(data)) ** 0.5 * 0.9)
+        data = _encode(image, output_format, quality)
+    return data
+
+# Podklad v procesu workeru (mmap rastru), nastaví ho _init_worker jednou při startu procesu
+_worker_base = None
+_worker_overview = None
+
+def _init_worker(raster, overview_size):
+    global _worker_base, _worker_overview
+    levels = open_raster(raster)
+    _worker_base = levels[0]
+    _worker_overview = make_overview(pick_level(levels, overview_size), overview_size)
+    load_font()
+
+def _warm_up():
+    return _worker_base is not None
+
+def _render_in_worker(players, config, selected_player_id, crop_area):
+    image = render_map(_worker_base, _worker_overview, players, config, selected_player_id, crop_area)
+    return encode_image(image, config)
+
+class MapRenderer:
+    """
+    Vykreslování mapy mimo event loop v procesech, které mají namapovaný dekódovaný raster mapy.
+    PNG se dekóduje jen jednou do rastru na disku (util.mapraster), workery ho sdílí přes mmap.
+    Procesy se nastartují hned při start(), ne až při prvním příkazu;
+    semafor omezuje, kolik renderů najednou čeká na pool.
+    """
+    def __init__(self, workers=MAP_RENDER_WORKERS, concurrency=MAP_RENDER_CONCURRENCY):
+        self.workers = max(1, workers)
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.executor = None
+        self.raster = None
+        self.overview_size = None
+
+    def is_ready(self):
+        return self.executor is not None
+
+    async def start(self, map_bytes, overview_size, raster_dir):
+        """Připraví raster mapy (jen pokud ještě není na disku) a spustí nad ním nový pool"""
+        loop = asyncio.get_event_loop()
+        raster = await loop.run_in_executor(None, build_raster, map_bytes, raster_dir)
+        await self.start_pool(raster, overview_size)
+
+    async def start_pool(self, raster, overview_size):
+        """Spustí nový pool nad rastrem mapy, starý pool se ukončí"""
+        self.raster = raster
+        self.overview_size = overview_size
+        old_executor, self.executor = self.executor, ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(raster, overview_size)
+        )
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+        loop = asyncio.get_event_loop()
+        # Předehřátí: každý worker se spustí a namapuje raster ještě před prvním renderem
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)])
+        logging.info(f"Map render pool ready with {self.workers} workers")
+
+    async def render(self, players, config, selected_player_id=None, crop_area=None):
+        """Vrátí zakódovaný obrázek jako BytesIO; čeká bez blokování event loopu"""
+        if self.executor is None:
+            raise RuntimeError("Map renderer is not started")
+        loop = asyncio.get_event_loop()
+        async with self.semaphore:
+            try:
+                data = await loop.run_in_executor(
+                    self.executor, _render_in_worker, list(players), dict(config), selected_player_id, crop_area
+                )
+            except BrokenProcessPool:
+                # Spadlý worker (např. nedostatek paměti) rozbije celý pool, založí se znovu
+                logging.error("Map render pool broken, restarting")
+                await self.start_pool(self.raster, self.overview_size)
+                raise
+        return io.BytesIO(data)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+class RenderCache:
+    """
+    LRU hotových obrázků mapy s limitem velikosti v bajtech.
+    Klíč začíná verzí dat hráčů, nová verze (snímek, kalibrace) cache zahodí. Souběžné
+    požadavky na stejný klíč čekají na jeden render místo toho, aby každý renderoval sám.
+    """
+    def __init__(self, max_bytes=MAP_RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.version = None
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, version):
+        """Zahodí obrázky starších dat; rozpracované rendery staré verze se už neuloží"""
+        self.version = version
+        self.entries.clear()
+        self.size = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if key[0] != self.version or len(data) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    async def get_or_render(self, key, render):
+        """
+        Vrátí obrázek pro klíč (version, ...) jako nový BytesIO. render() je coroutine
+        vracející BytesIO nebo None; None (chyba) se neukládá.
+        """
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return io.BytesIO(data)
+        task = self.in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._render(key, render))
+            self.in_flight[key] = task
+        data = await asyncio.shield(task)
+        return io.BytesIO(data) if data is not None else None
+
+    async def _render(self, key, render):
+        try:
+            image = await render()
+            if image is None:
+                return None
+            data = image.getvalue()
+            self.put(key, data)
+            return data
+        finally:
+            self.in_flight.pop(key, None)
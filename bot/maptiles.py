@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+from aiohttp import web
+from PIL import Image
+from util.config import MAP_TILE_HOST, MAP_TILE_PORT
+from util.mapraster import open_raster
+from util.maprender import transform_coordinates
+
+TILE_SIZE = 256
+# Dlaždice se jménem verze mapy v URL se nemění, prohlížeč je může držet rok
+TILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _write_tile(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    image.save(tmp_path, format='PNG', compress_level=6)
+    os.replace(tmp_path, path)
+
+class TilePyramid:
+    """
+    Mapa rozřezaná na XYZ pyramidu dlaždic 256 px, vytvářených až při prvním požadavku
+    a ukládaných na disk. Nejvyšší zoom odpovídá plnému rozlišení, nižší zoomy berou
+    zmenšené úrovně rastru (util.mapraster), takže se dlaždice jen vyřízne; zmenšuje se
+    až pod nejmenší úrovní rastru.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.raster = None
+        self.levels = []
+        self.max_zoom = 0
+        self.in_flight = {}
+
+    async def set_raster(self, raster):
+        if self.raster is not None and self.raster["digest"] == raster["digest"]:
+            return
+        self.raster = raster
+        self.levels = open_raster(raster)
+        width = max(self.levels[0].width, self.levels[0].height)
+        self.max_zoom = max(0, (width - 1).bit_length() - TILE_SIZE.bit_length() + 1)
+        self.in_flight = {}
+        # Mazání tisíců souborů nesmí blokovat event loop
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.remove_old_tiles, raster["digest"])
+
+    def remove_old_tiles(self, digest):
+        """Dlaždice předchozích verzí mapy už nikdo nenačte"""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name != digest:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    @property
+    def digest(self):
+        return self.raster["digest"] if self.raster else None
+
+    def tile_path(self, z, x, y):
+        return os.path.join(self.directory, self.digest, str(z), str(x), f"{y}.png")
+
+    def source(self, z):
+        """Obraz celé mapy v rozlišení zoomu z (TILE_SIZE * 2^z px na šířku)"""
+        level = self.max_zoom - z
+        if level < len(self.levels):
+            return self.levels[level], 1
+        # Pod nejmenší úrovní rastru se výřez zmenší při řezání
+        smallest = self.levels[-1]
+        return smallest, 2 ** (level - len(self.levels) + 1)
+
+    def render_tile(self, z, x, y):
+        image, factor = self.source(z)
+        size = TILE_SIZE * factor
+        box = (x * size, y * size, min(image.width, (x + 1) * size), min(image.height, (y + 1) * size))
+        tile = Image.new("RGBA", (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+        if box[0] < box[2] and box[1] < box[3]:
+            part = image.crop(box)
+            if factor > 1:
+                part = part.resize((max(1, part.width // factor), max(1, part.height // factor)), Image.LANCZOS)
+            tile.paste(part, (0, 0))
+        path = self.tile_path(z, x, y)
+        _write_tile(tile, path)
+        return path
+
+    async def get_tile(self, z, x, y):
+        """Cesta k souboru dlaždice (vytvoří ji v executoru, pokud ještě není), nebo None mimo mapu"""
+        if self.raster is None or not 0 <= z <= self.max_zoom or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            return None
+        path = self.tile_path(z, x, y)
+        if os.path.exists(path):
+            return path
+        key = (self.digest, z, x, y)
+        task = self.in_flight.get(key)
+        if task is None:
+            loop = asyncio.get_event_loop()
+            task = loop.run_in_executor(None, self.render_tile, z, x, y)
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+class MapTileServer:
+    """
+    Lokální HTTP endpoint pro webovou mapu:
+    /tiles/meta.json (aktuální verze mapy a šablona URL), /tiles/{verze}/{z}/{x}/{y}.png
+    a /tiles/players.json s polohami hráčů z posledního snímku v pixelech plné mapy.
+    """
+    def __init__(self, pyramid, host=MAP_TILE_HOST, port=MAP_TILE_PORT):
+        self.pyramid = pyramid
+        self.host = host
+        self.port = port
+        self.runner = None
+        self.overlay = None
+        self.overlay_etag = None
+
+    def set_players(self, snapshot, players, config):
+        """Vrstva hráčů pro nový snímek; verze snímku slouží jako ETag"""
+        markers = []
+        for player in players:
+            map_x, map_y = transform_coordinates(player.x, player.y, config)
+            markers.append({
+                "id": player.id, "name": player.name, "dino": player.dino,
+                "x": map_x, "y": map_y, "growth": round(player.growth)
+            })
+        self.overlay = json.dumps({
+            "version": snapshot.version, "taken": int(snapshot.taken),
+            "map_size": config["map_size"], "players": markers
+        }, ensure_ascii=False)
+        self.overlay_etag = f'"{snapshot.version}"'
+
+    async def start(self):
+        if self.runner is not None or not self.port:
+            return
+        app = web.Application(middlewares=[self.cors])
+        app.router.add_get("/tiles/meta.json", self.handle_meta)
+        app.router.add_get("/tiles/players.json", self.handle_players)
+        app.router.add_get(r"/tiles/{digest}/{z:\d+}/{x:\d+}/{y:\d+}.png", self.handle_tile)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logging.info(f"Map tile server listening on http://{self.host}:{self.port}/tiles/")
+
+    @web.middleware
+    async def cors(self, request, handler):
+        # Webová mapa běží na jiném portu (Express), dlaždice jsou veřejné; hlavička patří
+        # i k chybám (404, 503), aby je prohlížeč nehlásil jako selhání CORS
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            e.headers["Access-Control-Allow-Origin"] = "*"
+            raise
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    async def handle_meta(self, request):
+        if self.pyramid.digest is None:
+            raise web.HTTPServiceUnavailable(text="Map not loaded")
+        return web.json_response({
+            "version": self.pyramid.digest,
+            "tile_size": TILE_SIZE,
+            "min_zoom": 0,
+            "max_zoom": self.pyramid.max_zoom,
+            "url": f"/tiles/{self.pyramid.digest}/{{z}}/{{x}}/{{y}}.png",
+        }, headers={"Cache-Control": "no-cache"})
+
+    async def handle_players(self, request):
+        if self.overlay is None:
+            raise web.HTTPServiceUnavailable(text="No player data yet")
+        headers = {"Cache-Control": "no-cache", "ETag": self.overlay_etag}
+        if request.headers.get("If-None-Match") == self.overlay_etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=self.overlay, content_type="application/json", headers=headers)
+
+    async def handle_tile(self, request):
+        digest = request.match_info["digest"]
+        if digest != self.pyramid.digest:
+            # Dlaždice starší verze mapy už nejsou, klient si má znovu načíst meta.json
+            raise web.HTTPNotFound()
+        z, x, y = (int(request.match_info[key]) for key in ("z", "x", "y"))
+        path = await self.pyramid.get_tile(z, x, y)
+        if path is None:
+            raise web.HTTPNotFound()
+        return web.FileResponse(path, headers={"Cache-Control": TILE_CACHE_CONTROL})
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
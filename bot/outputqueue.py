@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import nextcord
+from util.config import OUTPUT_LINGER, OUTPUT_DIGEST_THRESHOLD
+
+# Limity Discordu pro jednu zprávu
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 6000
+MAX_DESCRIPTION_CHARS = 4096
+
+def embed_length(embed):
+    """Počet znaků embedu, jak ho počítá Discord do limitu 6000 na zprávu"""
+    length = len(embed.title or "") + len(embed.description or "")
+    length += sum(len(field.name or "") + len(field.value or "") for field in embed.fields)
+    if embed.footer and embed.footer.text:
+        length += len(embed.footer.text)
+    return length
+
+def digest_line(embed, with_title=False):
+    """Jednořádkové shrnutí embedu do souhrnné zprávy"""
+    parts = [f"**{embed.title}**"] if with_title and embed.title else []
+    parts.append(embed.description or "")
+    parts += [f"{field.name}: {field.value}" for field in embed.fields]
+    return " | ".join(part for part in parts if part)
+
+def pack_messages(embeds):
+    """Rozdělí embedy do zpráv po nejvýše 10 embedech a 6000 znacích"""
+    messages, current, current_length = [], [], 0
+    for embed in embeds:
+        length = embed_length(embed)
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_length + length > MAX_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current, current_length = [], 0
+        current.append(embed)
+        current_length += length
+    if current:
+        messages.append(current)
+    return messages
+
+def build_digest(embeds):
+    """Sloučí nával embedů do souhrnných embedů (řádek na událost, popis do 4096 znaků)"""
+    titles = {embed.title for embed in embeds}
+    # Společný titulek jde do hlavičky souhrnu, různé titulky (např. kanály chatu) zůstanou u řádků
+    title = titles.pop() if len(titles) == 1 and embeds[0].title else "Souhrn"
+    with_title = title == "Souhrn"
+    digests, lines, length = [], [], 0
+    for embed in embeds:
+        line = digest_line(embed, with_title)[:MAX_DESCRIPTION_CHARS]
+        if lines and length + len(line) + 1 > MAX_DESCRIPTION_CHARS:
+            digests.append(lines)
+            lines, length = [], 0
+        lines.append(line)
+        length += len(line) + 1
+    if lines:
+        digests.append(lines)
+    return [
+        nextcord.Embed(title=f"{title} ({len(lines)})", description="\n".join(lines))
+        for lines in digests
+    ]
+
+class ChannelQueue:
+    """
+    Fronta embedů pro jeden kanál s vlastním odesílacím taskem.
+    Čekající embedy se posílají po 10 v jedné zprávě, nad OUTPUT_DIGEST_THRESHOLD se slučují do souhrnu.
+    """
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.channel_id = channel_id
+        self.pending = []
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def put(self, embeds):
+        self.pending.extend(embeds)
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            await self.wakeup.wait()
+            # Krátké zdržení, ať se sejde víc událostí do jedné zprávy
+            await asyncio.sleep(OUTPUT_LINGER)
+            self.wakeup.clear()
+            embeds, self.pending = self.pending, []
+            if not embeds:
+                continue
+            channel = self.bot.get_channel(self.channel_id)
+            if channel is None:
+                logging.error(f"Output channel {self.channel_id} not found or bot does not have permission to access it.")
+                continue
+            if len(embeds) > OUTPUT_DIGEST_THRESHOLD:
+                logging.info(f"Collapsing {len(embeds)} embeds for channel {self.channel_id} into a digest")
+                embeds = build_digest(embeds)
+            for message_embeds in pack_messages(embeds):
+                await self.send(channel, message_embeds)
+
+    async def send(self, channel, embeds):
+        # Rate-limit buckety (X-RateLimit-* hlavičky) hlídá HTTP klient nextcordu, tady se jen opakuje po 429
+        for attempt in range(3):
+            try:
+                await channel.send(embeds=embeds)
+                return
+            except nextcord.HTTPException as e:
+                if e.status != 429:
+                    logging.error(f"Error sending messages to channel {self.channel_id}: {e}")
+                    return
+                retry_after = getattr(e, "retry_after", None) or 2 ** attempt
+                logging.warning(f"Rate limited on channel {self.channel_id}, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+            except Exception as e:
+                logging.error(f"Error sending messages to channel {self.channel_id}: {e}")
+                return
+        logging.error(f"Dropping {len(embeds)} embeds for channel {self.channel_id} after repeated 429")
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+class OutputQueue:
+    """Sdílené odesílání embedů do kanálů, jedna ChannelQueue na kanál"""
+    def __init__(self, bot):
+        self.bot = bot
+        self.channels = {}
+
+    def enqueue(self, channel_id, embeds):
+        """Zařadí embedy k odeslání a hned se vrátí, odesílá se na pozadí"""
+        if isinstance(embeds, nextcord.Embed):
+            embeds = [embeds]
+        if not embeds:
+            return
+        if channel_id not in self.channels:
+            self.channels[channel_id] = ChannelQueue(self.bot, channel_id)
+        self.channels[channel_id].put(embeds)
+
+def get_output_queue(bot):
+    """Vrátí sdílenou instanci OutputQueue pro daného bota"""
+    if not hasattr(bot, "output_queue"):
+        bot.output_queue = OutputQueue(bot)
+    return bot.output_queue
@@ -0,0 +1,223 @@
+from bisect import bisect_left, insort
+
+# Fuzzy hledání (SymSpell) indexuje mazání jen z prvních PREFIX_LENGTH znaků jména,
+# delší jména se ověří plnou editační vzdáleností
+PREFIX_LENGTH = 7
+
+def normalize(name):
+    """Klíč pro hledání: jméno bez okrajových mezer a bez ohledu na velikost písmen"""
+    return (name or "").strip().casefold()
+
+def _deletes(key):
+    """Varianty prefixu klíče s nejvýše jedním smazaným znakem (včetně prefixu samotného)"""
+    prefix = key[:PREFIX_LENGTH]
+    variants = {prefix}
+    for i in range(len(prefix)):
+        variants.add(prefix[:i] + prefix[i + 1:])
+    return variants
+
+def within_one_edit(a, b):
+    """True, pokud se řetězce liší nejvýše o jedno vložení, smazání, záměnu nebo prohození sousedních znaků"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    # Společný začátek, za první odlišností musí zbytek sedět
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+class PlayerIndex:
+    """
+    Sdílený index hráčů: Steam ID, EOS ID, aktuální jméno a historie jmen.
+    Hledání podle začátku jména jde přes seřazený seznam (bisect), překlepy o jeden znak
+    přes tabulku mazání (SymSpell), takže dotaz nezávisí na počtu hráčů v indexu.
+    """
+    def __init__(self):
+        self.players = {}
+        self.eos_ids = {}
+        self.by_key = {}
+        self.keys = []
+        self.deletes = {}
+        self.bulk = False
+
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, player_id):
+        return player_id in self.players
+
+    def _index_key(self, key, player_id):
+        ids = self.by_key.get(key)
+        if ids is None:
+            ids = self.by_key[key] = set()
+            if self.bulk:
+                self.keys.append(key)
+            else:
+                insort(self.keys, key)
+            for variant in _deletes(key):
+                # Většina variant patří jedinému jménu, množina vzniká až při kolizi (šetří paměť)
+                keys = self.deletes.get(variant)
+                if keys is None:
+                    self.deletes[variant] = key
+                elif isinstance(keys, str):
+                    if keys != key:
+                        self.deletes[variant] = {keys, key}
+                else:
+                    keys.add(key)
+        ids.add(player_id)
+
+    def _unindex_key(self, key, player_id):
+        ids = self.by_key.get(key)
+        if ids is None:
+            return
+        ids.discard(player_id)
+        if ids:
+            return
+        del self.by_key[key]
+        del self.keys[bisect_left(self.keys, key)]
+        for variant in _deletes(key):
+            keys = self.deletes.get(variant)
+            if keys == key:
+                del self.deletes[variant]
+            elif isinstance(keys, set):
+                keys.discard(key)
+                if len(keys) == 1:
+                    self.deletes[variant] = keys.pop()
+
+    def add(self, player_id, name, eos_id=None):
+        """Přidá hráče nebo aktualizuje jeho jméno; předchozí jména zůstanou dohledatelná"""
+        if not player_id:
+            return
+        player = self.players.get(player_id)
+        if player is None:
+            player = self.players[player_id] = {"name": None, "eos_id": None, "names": []}
+        if eos_id and eos_id != player["eos_id"]:
+            if player["eos_id"]:
+                self.eos_ids.pop(player["eos_id"], None)
+            player["eos_id"] = eos_id
+            self.eos_ids[eos_id] = player_id
+        name = (name or "").strip()
+        if not name or name == player["name"]:
+            return
+        player["name"] = name
+        if name not in player["names"]:
+            player["names"].append(name)
+            self._index_key(normalize(name), player_id)
+
+    def add_many(self, players):
+        """Hromadné naplnění z [(player_id, jméno)] nebo [(player_id, jméno, eos_id)], seřadí se jednou na konci"""
+        self.bulk = True
+        try:
+            for player in players:
+                self.add(*player)
+        finally:
+            self.bulk = False
+            self.keys.sort()
+
+    def remove(self, player_id):
+        player = self.players.pop(player_id, None)
+        if player is None:
+            return
+        if player["eos_id"]:
+            self.eos_ids.pop(player["eos_id"], None)
+        for name in player["names"]:
+            self._unindex_key(normalize(name), player_id)
+
+    def clear(self):
+        self.players = {}
+        self.eos_ids = {}
+        self.by_key = {}
+        self.keys = []
+        self.deletes = {}
+
+    def name(self, player_id):
+        player = self.players.get(player_id)
+        return player["name"] if player else None
+
+    def names(self, player_id):
+        """Historie jmen hráče od nejstaršího"""
+        player = self.players.get(player_id)
+        return list(player["names"]) if player else []
+
+    def resolve(self, identifier):
+        """Převede Steam ID nebo EOS ID na ID hráče v indexu, jinak None"""
+        identifier = (identifier or "").strip()
+        if identifier in self.players:
+            return identifier
+        return self.eos_ids.get(identifier)
+
+    def find(self, name):
+        """ID hráčů, kteří jméno (bez ohledu na velikost písmen) nosí nebo nosili"""
+        return set(self.by_key.get(normalize(name), ()))
+
+    def prefix_keys(self, prefix):
+        """Klíče začínající prefixem v abecedním pořadí, postupně od místa nalezeného bisectem"""
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key = self.keys[i]
+            if not key.startswith(prefix):
+                return
+            yield key
+
+    def fuzzy_keys(self, query):
+        """Klíče ve vzdálenosti nejvýše jedné editace od dotazu"""
+        candidates = set()
+        for variant in _deletes(query):
+            keys = self.deletes.get(variant)
+            if isinstance(keys, str):
+                candidates.add(keys)
+            elif keys:
+                candidates |= keys
+        return sorted(key for key in candidates if within_one_edit(query, key))
+
+    def search(self, query, limit=25, include=None):
+        """
+        Vrátí [(player_id, jméno)] nejvýše limit hráčů: přesná shoda, pak začátek jména,
+        pak jména s jedním překlepem. include omezí výsledky na ID, pro která vrátí True.
+        """
+        key = normalize(query)
+        if not key:
+            return []
+        results, found = [], set()
+
+        def collect(ids):
+            for player_id in ids:
+                if player_id in found or (include is not None and not include(player_id)):
+                    continue
+                found.add(player_id)
+                results.append((player_id, self.players[player_id]["name"]))
+                if len(results) >= limit:
+                    return True
+            return False
+
+        resolved = self.resolve(query)
+        if resolved and collect([resolved]):
+            return results
+        for prefix_key in self.prefix_keys(key):
+            if collect(sorted(self.by_key[prefix_key])):
+                return results
+        for fuzzy_key in self.fuzzy_keys(key):
+            if not fuzzy_key.startswith(key) and collect(sorted(self.by_key[fuzzy_key])):
+                return results
+        return results
+
+    def suggestions(self, query, limit=25, include=None):
+        """Jména pro autocomplete slash příkazů (Discord jich přijme nejvýše 25)"""
+        names = []
+        for _, name in self.search(query, limit, include):
+            if name not in names:
+                names.append(name)
+        return names
+
+def get_player_index(bot):
+    """Vrátí sdílenou instanci PlayerIndex pro daného bota"""
+    if not hasattr(bot, "player_index"):
+        bot.player_index = PlayerIndex()
+    return bot.player_index
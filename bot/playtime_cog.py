@@ -4,10 +4,16 @@ import logging
 import json
 import os
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
 from util.config import HOUR_STATS, DEFAULT_GUILDS
+from util.leaderboard import Leaderboard
+from util.playtimestore import PlaytimeStore
+from util.liveembed import get_live_embeds
+from util.playerindex import get_player_index
+from util.rconsnapshot import get_rcon_snapshots
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 class PlaytimeTracker(commands.Cog):
     """
@@ -16,26 +22,40 @@ class PlaytimeTracker(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
-        self.active_players_cog = None
         self.stats_channel_id = HOUR_STATS
-        self.playtime_stats = defaultdict(lambda: {"total_minutes": 0, "player_name": "", "last_seen": None, "online": False})
+        self.playtime_stats = defaultdict(lambda: {"total_minutes": 0, "total_seconds": 0, "player_name": "", "last_seen": None, "online": False})
         self.stats_file = "playtime_stats.json"
-        self.stats_message = None
+        # Join/leave sessions with hourly and daily rollups (totals stay in playtime_stats.json for the web)
+        self.store = PlaytimeStore()
+        self.online_ids = set()
+        # Ranking by playtime, kept up to date on every change instead of sorting all players
+        self.leaderboard = Leaderboard()
+        # Shared name index for player lookups and autocomplete
+        self.player_index = get_player_index(bot)
         
         # Load existing statistics if file exists
         self.load_stats()
         
+        # Leaderboard message is edited only when its content changes, via the shared LiveEmbeds
+        self.live_embeds = get_live_embeds(bot)
+        self.live_embeds.register(
+            "playtime_stats", self.stats_channel_id, self.create_stats_embed,
+            adopt_title="The Isle - Top Players by Playtime"
+        )
+        
         # Task loops
-        self.update_stats_message.start()
         self.save_stats_periodic.start()
-        self.track_active_players.start()
+        # Online players come from the shared RCON snapshot (the same one the active players list and map use)
+        self.snapshots = get_rcon_snapshots(bot)
+        self.snapshots.subscribe(self.on_snapshot)
 
     def cog_unload(self):
         """Called when the cog is unloaded"""
-        self.update_stats_message.cancel()
+        self.live_embeds.unregister("playtime_stats")
         self.save_stats_periodic.cancel()
-        self.track_active_players.cancel()
+        self.snapshots.unsubscribe(self.on_snapshot)
         self.save_stats()  # Save statistics when shutting down
+        asyncio.create_task(self.store.close())
     
     def load_stats(self):
         """Load statistics from file"""
@@ -47,12 +67,17 @@ class PlaytimeTracker(commands.Cog):
                         # Ensure the structure is correct and contains all necessary keys
                         player_stats = {
                             "total_minutes": stats.get("total_minutes", 0),
+                            "total_seconds": stats.get("total_seconds", stats.get("total_minutes", 0) * 60),
                             "player_name": stats.get("player_name", ""),
                             "last_seen": stats.get("last_seen"),
                             "online": False  # Always set to False on startup
                         }
                         
                         self.playtime_stats[player_id] = player_stats
+                        self.leaderboard.update(player_id, player_stats["total_seconds"])
+                    self.player_index.add_many(
+                        (player_id, stats["player_name"]) for player_id, stats in self.playtime_stats.items()
+                    )
                 logging.info(f"Playtime statistics loaded from file {self.stats_file}")
         except Exception as e:
             logging.error(f"Error loading playtime statistics: {e}")
@@ -71,119 +96,128 @@ class PlaytimeTracker(commands.Cog):
         """Periodically save statistics to file"""
         self.save_stats()
     
-    def get_active_players_cog(self):
-        """Get the ActivePlayersRCON cog reference"""
-        if self.active_players_cog is None:
-            self.active_players_cog = self.bot.get_cog("ActivePlayersRCON")
-        return self.active_players_cog
-    
-    @tasks.loop(minutes=3)
-    async def track_active_players(self):
-        """Track active players and update their playtime every 1 minute"""
-        active_players_cog = self.get_active_players_cog()
-        if active_players_cog is None:
-            logging.warning("ActivePlayersRCON cog not found. Cannot track players.")
-            return
-        
+    async def on_snapshot(self, snapshot):
+        """Feed every presence snapshot from the shared RconSnapshots to the session ledger"""
         try:
-            # Get raw playerlist from RCON
-            response = await active_players_cog.get_player_list()
-            if response is None:
-                logging.error("Failed to get player list from RCON")
-                return
+            current_time = datetime.fromtimestamp(snapshot.taken).isoformat()
             
-            # Parse player names
-            current_players = active_players_cog.parse_player_list(response)
-            current_time = datetime.now().isoformat()
+            # Presence snapshot: Steam ID -> name of everyone online right now
+            present = {}
+            for player in snapshot.players:
+                if player.steam_id:
+                    player_id = player.steam_id
+                    if player.name is None:
+                        # Names could not be paired with Steam IDs in this snapshot: count the
+                        # playtime, but skip temp merges and renames that could hit the wrong player
+                        present[player_id] = self.playtime_stats[player_id]["player_name"]
+                        self.player_index.add(player_id, None, player.eos_id)
+                        continue
+                    # Playtime collected under a temporary name-based ID moves to the Steam ID
+                    temp_id = f"temp_{player.name}"
+                    if temp_id in self.playtime_stats:
+                        await self.merge_temp_record(temp_id, player_id, player.name)
+                else:
+                    # Without a Steam ID in the response fall back to the name
+                    player_id = self.find_player_id_by_name(player.name) or f"temp_{player.name}"
+                
+                # Records are keyed by Steam ID, so a rename only updates the name
+                self.playtime_stats[player_id]["player_name"] = player.name
+                self.player_index.add(player_id, player.name, player.eos_id)
+                present[player_id] = player.name
             
-            # First, mark all players as offline
-            for player_id, stats in self.playtime_stats.items():
-                if stats["online"]:
-                    # If the player was online before, update their playtime
-                    # before marking them as offline
-                    self.playtime_stats[player_id]["online"] = False
+            # Sessions open and close in the ledger; it returns the time played since the last snapshot
+            added = await self.store.record_snapshot(present, snapshot.taken)
+            for player_id, seconds in added.items():
+                self.add_playtime(player_id, seconds)
             
-            # Extract Steam ID from player list and update online status
-            for player_name in current_players:
-                # Try to find Steam ID from player name matching in our records
-                player_id = self.find_player_id_by_name(player_name)
-                
-                if player_id:
-                    # Update existing player
-                    if not self.playtime_stats[player_id]["online"]:
-                        # Player just came online
-                        self.playtime_stats[player_id]["online"] = True
-                        self.playtime_stats[player_id]["last_seen"] = current_time
-                    else:
-                        # Player was already online, add 1 minute to their playtime
-                        self.playtime_stats[player_id]["total_minutes"] += 1
-                else:
-                    # New player, create record with default values
-                    # We'll create a temporary ID based on the name until we can associate with Steam ID
-                    temp_id = f"temp_{player_name}"
-                    self.playtime_stats[temp_id] = {
-                        "total_minutes": 0,
-                        "player_name": player_name,
-                        "last_seen": current_time,
-                        "online": True
-                    }
+            for player_id in self.online_ids - present.keys():
+                self.playtime_stats[player_id]["online"] = False
+            for player_id in present:
+                self.playtime_stats[player_id]["online"] = True
+                self.playtime_stats[player_id]["last_seen"] = current_time
+            self.online_ids = set(present)
             
-            # Update total minutes for all online players
-            for player_id, stats in self.playtime_stats.items():
-                if stats["online"]:
-                    self.playtime_stats[player_id]["total_minutes"] += 1
+            self.update_stats_message()
         
         except Exception as e:
             logging.error(f"Error tracking active players: {e}")
             import traceback
             logging.error(traceback.format_exc())
     
+    async def merge_temp_record(self, temp_id, steam_id, player_name):
+        """Move a temporary name-keyed record, its sessions and rollups onto the player's Steam ID"""
+        temp_stats = self.playtime_stats.pop(temp_id)
+        stats = self.playtime_stats[steam_id]
+        stats["player_name"] = player_name
+        stats["last_seen"] = max(filter(None, [stats["last_seen"], temp_stats["last_seen"]]), default=None)
+        stats["online"] = stats["online"] or temp_stats["online"]
+        if temp_id in self.online_ids:
+            self.online_ids.discard(temp_id)
+            self.online_ids.add(steam_id)
+        self.leaderboard.remove(temp_id)
+        self.player_index.remove(temp_id)
+        self.player_index.add(steam_id, player_name)
+        await self.store.rename_player(temp_id, steam_id)
+        self.add_playtime(steam_id, temp_stats["total_seconds"])
+        logging.info(f"Merged temporary playtime record {temp_id} into {steam_id}")
+
+    def add_playtime(self, player_id, seconds):
+        """Add played seconds to the player's all-time total"""
+        stats = self.playtime_stats[player_id]
+        stats["total_seconds"] += seconds
+        stats["total_minutes"] = stats["total_seconds"] // 60
+        self.leaderboard.update(player_id, stats["total_seconds"])
+
+    def has_record(self, player_id):
+        """Whether the player has a playtime record (the index is shared with other cogs)"""
+        return player_id in self.playtime_stats
+
     def find_player_id_by_name(self, player_name):
         """Find a player's ID by their name"""
-        # First check for exact matches
-        for player_id, stats in self.playtime_stats.items():
-            if stats["player_name"].lower() == player_name.lower():
-                return player_id
-                
-        # If no exact match, check for temporary IDs based on player name
-        temp_id = f"temp_{player_name}"
-        if temp_id in self.playtime_stats:
-            return temp_id
-            
-        return None
+        # Exact (case-insensitive) name matches, records with a Steam ID before temporary IDs
+        player_ids = [player_id for player_id in self.player_index.find(player_name) if self.has_record(player_id)]
+        if not player_ids:
+            return None
+        return min(player_ids, key=lambda player_id: (player_id.startswith("temp_"), player_id))
     
     def get_top_players(self, limit=10):
         """Return top X players by playtime"""
-        sorted_stats = sorted(
-            [(id, stats) for id, stats in self.playtime_stats.items() if stats["total_minutes"] > 0],
-            key=lambda x: x[1]["total_minutes"],
-            reverse=True
-        )
-        return sorted_stats[:limit]
+        return [(player_id, self.playtime_stats[player_id]) for player_id, _ in self.leaderboard.top(limit)]
     
-    def get_player_stats(self, player_id):
-        """Return statistics for a specific player"""
+    def resolve_player_id(self, player_id):
+        """Return the record ID for a Steam ID, EOS ID, player name or the beginning of a name (one typo allowed)"""
         # First, try to find the player with exact ID match
         if player_id in self.playtime_stats:
-            stats = self.playtime_stats[player_id]
-            logging.info(f"Found player stats for Steam ID {player_id}: {stats}")
-            return stats
+            return player_id
+        
+        record_id = self.player_index.resolve(player_id)
+        if record_id and self.has_record(record_id):
+            return record_id
             
-        # If not found, check if it's a temp ID by looking at player names
-        for id, stats in self.playtime_stats.items():
-            # Check if player name matches the given ID (for case when user enters name instead of ID)
-            if stats["player_name"].lower() == player_id.lower():
-                logging.info(f"Found player stats by name match: {player_id} -> {id}")
-                return stats
-                
-            # Check if the ID is contained in the temp_id
-            if id.startswith("temp_") and player_id.lower() in id.lower():
-                logging.info(f"Found player stats in temporary ID: {id}")
-                return stats
+        # Check if player name matches the given ID (for case when user enters name instead of ID)
+        record_id = self.find_player_id_by_name(player_id)
+        if record_id:
+            logging.info(f"Found player stats by name match: {player_id} -> {record_id}")
+            return record_id
+        
+        # Name prefix or a name with one typo
+        results = self.player_index.search(player_id, limit=1, include=self.has_record)
+        if results:
+            logging.info(f"Found player stats by name search: {player_id} -> {results[0][0]}")
+            return results[0][0]
+        return None
+    
+    def get_player_stats(self, player_id):
+        """Return statistics for a specific player"""
+        record_id = self.resolve_player_id(player_id)
+        if record_id is not None:
+            stats = self.playtime_stats[record_id]
+            logging.info(f"Found player stats for {player_id}: {stats}")
+            return stats
                 
         # If still not found, return empty stats
         logging.info(f"No stats found for player {player_id}, returning default")
-        return {"total_minutes": 0, "player_name": player_id, "last_seen": None, "online": False}
+        return {"total_minutes": 0, "total_seconds": 0, "player_name": player_id, "last_seen": None, "online": False}
     
     def format_playtime(self, minutes):
         """Format minutes as hours and minutes"""
@@ -222,7 +256,7 @@ class PlaytimeTracker(commands.Cog):
         embed.add_field(name="Leaderboard", value=value_text, inline=False)
         
         # Add current online count
-        online_count = sum(1 for stats in self.playtime_stats.values() if stats["online"])
+        online_count = len(self.online_ids)
         embed.add_field(name="Currently Online", value=f"{online_count} players", inline=False)
         
         return embed
@@ -260,18 +294,31 @@ class PlaytimeTracker(commands.Cog):
         if not stats["online"]:
             embed.add_field(name="Last Seen", value=last_seen_str, inline=True)
         
+        record_id = self.resolve_player_id(player_id)
+        
         # Only look for rank if player has playtime
         if stats["total_minutes"] > 0:
-            # Find rank in leaderboard
-            sorted_stats = sorted(
-                [(id, st) for id, st in self.playtime_stats.items() if st["total_minutes"] > 0],
-                key=lambda x: x[1]["total_minutes"],
-                reverse=True
-            )
-            
-            rank = next((i for i, (pid, _) in enumerate(sorted_stats, 1) if pid == player_id or (isinstance(pid, str) and player_id.lower() in pid.lower())), None)
+            rank = self.leaderboard.rank(record_id)
             if rank:
-                embed.add_field(name="Leaderboard Rank", value=f"#{rank} of {len(sorted_stats)}", inline=False)
+                percentile = self.leaderboard.percentile(record_id)
+                embed.add_field(
+                    name="Leaderboard Rank",
+                    value=f"#{rank} of {len(self.leaderboard)} (more than {percentile:.0f}% of players)",
+                    inline=False
+                )
+        
+        # Recent activity comes from the precomputed daily rollups
+        if record_id:
+            week_seconds = await self.store.player_days(record_id, 7)
+            embed.add_field(name="Last 7 Days", value=self.format_playtime(week_seconds // 60), inline=True)
+            weekdays = await self.store.weekday_seconds(record_id)
+            if weekdays:
+                busiest = sorted(weekdays.items(), key=lambda x: x[1], reverse=True)[:3]
+                embed.add_field(
+                    name="Most Active Days",
+                    value="\n".join(f"{WEEKDAYS[day]}: {self.format_playtime(seconds // 60)}" for day, seconds in busiest),
+                    inline=True
+                )
         
         # Footer varies based on if the original ID was used or we found a match
         if player_id in self.playtime_stats:
@@ -282,117 +329,15 @@ class PlaytimeTracker(commands.Cog):
         embed.set_footer(text=footer_text)
         return embed
     
-    async def setup_embed(self):
-        """Set up the embed message - find existing or create new"""
-        channel = self.bot.get_channel(self.stats_channel_id)
-        if channel is None:
-            logging.error(f"Channel with ID {self.stats_channel_id} not found!")
-            return
-        
-        logging.info(f"Setting up playtime embed in channel {channel.name} ({self.stats_channel_id})")
-        
-        # Check if channel already has playtime messages from this bot
-        message_found = False
-        async for message in channel.history(limit=20):
-            if (message.author == self.bot.user and message.embeds and 
-                len(message.embeds) > 0 and
-                "The Isle - Top Players by Playtime" in message.embeds[0].title):
-                self.stats_message = message
-                logging.info(f"Found existing playtime embed message: {self.stats_message.id}")
-                message_found = True
-                break
-        
-        # If no message found, create a new one
-        if not message_found:
-            # Create and send new embed
-            embed = await self.create_stats_embed()
-            try:
-                # First check for the kill stats message and send after it
-                kill_stats_found = False
-                async for message in channel.history(limit=10):
-                    if (message.author == self.bot.user and message.embeds and 
-                        len(message.embeds) > 0 and
-                        "Top 10 Killers" in message.embeds[0].title):
-                        kill_stats_found = True
-                        # Send one empty line after kill stats for spacing
-                        await channel.send("_ _")
-                        self.stats_message = await channel.send(embed=embed)
-                        logging.info(f"Created new playtime embed message after kill stats: {self.stats_message.id}")
-                        break
-                
-                # If kill stats not found, just send normally
-                if not kill_stats_found:
-                    self.stats_message = await channel.send(embed=embed)
-                    logging.info(f"Created new playtime embed message: {self.stats_message.id}")
-            except Exception as e:
-                logging.error(f"Error creating playtime message: {e}")
-        
-        # Update the embed content
-        await self.update_embed_content()
-    
-    async def update_embed_content(self):
-        """Update the embed with current data"""
-        if not self.stats_message:
-            logging.warning("No stats message to update, setting up a new one")
-            await self.setup_embed()
-            return
-            
-        try:
-            embed = await self.create_stats_embed()
-            await self.stats_message.edit(embed=embed)
-            logging.info("Updated playtime stats embed")
-        except Exception as e:
-            logging.error(f"Error updating playtime embed: {e}")
-            # Reset message reference and try to set up again
-            self.stats_message = None
-            await self.setup_embed()
-    
-    @tasks.loop(minutes=1)
-    async def update_stats_message(self):
-        """Update the message with top 10 players by playtime every 1 minute"""
-        try:
-            channel = self.bot.get_channel(self.stats_channel_id)
-            if not channel:
-                logging.error("Stats channel not found.")
-                return
-                
-            # If message doesn't exist, set it up
-            if not self.stats_message:
-                await self.setup_embed()
-            else:
-                # Try to update the existing message
-                try:
-                    await self.update_embed_content()
-                except (nextcord.NotFound, nextcord.HTTPException) as e:
-                    logging.error(f"Error updating message: {e}")
-                    # Message was deleted, create a new one
-                    self.stats_message = None
-                    await self.setup_embed()
-                    
-        except Exception as e:
-            logging.error(f"Error updating stats message: {e}")
-    
-    @track_active_players.before_loop
-    @update_stats_message.before_loop
-    async def before_loop(self):
-        await self.bot.wait_until_ready()
+    def update_stats_message(self):
+        """Request an update of the top 10 playtime message (edited only when it changed)"""
+        self.live_embeds.request_update("playtime_stats")
     
     @commands.Cog.listener()
     async def on_ready(self):
         """Called when the bot is ready"""
         logging.info("PlaytimeTracker cog is ready!")
-        # Wait longer before setting up the embed to ensure all services are ready
-        # and to let other cogs initialize first
-        await asyncio.sleep(30)  # Increased to 30 seconds
-        
-        # Get and log channel info
-        channel = self.bot.get_channel(self.stats_channel_id)
-        if channel:
-            logging.info(f"Playtime stats channel found: {channel.name} ({self.stats_channel_id})")
-        else:
-            logging.error(f"Playtime stats channel NOT found: {self.stats_channel_id}")
-            
-        await self.setup_embed()
+        self.update_stats_message()
         logging.info("Forced playtime stats message update on bot start")
     
     @nextcord.slash_command(name="hours", description="View player playtime statistics")
@@ -444,6 +389,53 @@ class PlaytimeTracker(commands.Cog):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
     
+    @show_hours.on_autocomplete("name")
+    async def autocomplete_hours_name(self, interaction: nextcord.Interaction, name: str):
+        """Suggest player names as the user types; without input offer the top players"""
+        if not name:
+            names = [stats["player_name"] for _, stats in self.get_top_players(25)]
+            await interaction.response.send_autocomplete(list(dict.fromkeys(n for n in names if n)))
+            return
+        await interaction.response.send_autocomplete(self.player_index.suggestions(name, include=self.has_record))
+    
+    @nextcord.slash_command(name="tophours", description="View top players by playtime in recent days")
+    async def show_top_hours(self,
+                             interaction: nextcord.Interaction,
+                             days: int = nextcord.SlashOption(
+                                 name="days",
+                                 description="Number of days to include, today counts as the first one",
+                                 required=False,
+                                 default=7,
+                                 min_value=1,
+                                 max_value=365
+                             )):
+        """
+        View the top 10 players by playtime over the last few days
+        
+        Parameters
+        -----------
+        days: int
+            Length of the period in days (7 = this week including today)
+        """
+        top_players = await self.store.top_days(days, 10)
+        
+        embed = nextcord.Embed(
+            title=f"⏱️ Top Players - Last {days} Days",
+            color=nextcord.Color.blue()
+        )
+        
+        if not top_players:
+            embed.add_field(name="No statistics", value="There is no recorded playtime in this period", inline=False)
+        else:
+            value_text = ""
+            for i, (player_id, seconds) in enumerate(top_players, 1):
+                player_name = self.playtime_stats[player_id]["player_name"] if self.has_record(player_id) else None
+                value_text += f"{i}. **{player_name or f'Player {player_id}'}** \"{self.format_playtime(seconds // 60)}\"\n"
+            embed.add_field(name="Leaderboard", value=value_text, inline=False)
+        
+        embed.set_footer(text=f"Updated: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @nextcord.slash_command(name="resetplaytime", description="Reset playtime statistics (Admin only)", guild_ids=DEFAULT_GUILDS)
     async def reset_playtime(self, interaction: nextcord.Interaction, confirm: str = nextcord.SlashOption(
         name="confirm",
@@ -470,6 +462,9 @@ class PlaytimeTracker(commands.Cog):
             
         # Reset statistics - clear dictionary but preserve defaultdict functionality
         self.playtime_stats.clear()
+        self.leaderboard.clear()
+        self.online_ids = set()
+        await self.store.reset()
         
         # Save empty statistics to file
         try:
@@ -484,7 +479,7 @@ class PlaytimeTracker(commands.Cog):
             return
         
         # Update displayed message
-        await self.update_stats_message()
+        self.update_stats_message()
         
         # Information about successful reset
         await interaction.response.send_message("All playtime statistics have been reset successfully!", ephemeral=True)
@@ -505,32 +500,31 @@ class PlaytimeTracker(commands.Cog):
         # Check if this player name exists in our records
         temp_id = f"temp_{player_name}"
         
-        # If there's a temporary record, update it
+        # If there's a temporary record, move it to the Steam ID
         if temp_id in self.playtime_stats:
-            # Transfer playtime stats from temp to permanent ID
-            temp_stats = self.playtime_stats[temp_id]
-            self.playtime_stats[steam_id] = {
-                "total_minutes": temp_stats["total_minutes"],
-                "player_name": player_name,
-                "last_seen": temp_stats["last_seen"],
-                "online": temp_stats["online"]
-            }
-            # Remove temp record
-            del self.playtime_stats[temp_id]
+            await self.merge_temp_record(temp_id, steam_id, player_name)
             await interaction.response.send_message(f"Successfully linked Steam ID {steam_id} to player {player_name}!", ephemeral=True)
+        elif steam_id in self.playtime_stats:
+            # Already tracked by Steam ID from the player list, only the name is updated
+            self.playtime_stats[steam_id]["player_name"] = player_name
+            await interaction.response.send_message(f"Steam ID {steam_id} is already tracked, name set to {player_name}!", ephemeral=True)
         else:
             # Create a new record
             self.playtime_stats[steam_id] = {
                 "total_minutes": 0,
+                "total_seconds": 0,
                 "player_name": player_name,
                 "last_seen": datetime.now().isoformat(),
                 "online": False
             }
+            self.leaderboard.update(steam_id, 0)
             await interaction.response.send_message(f"Created new record linking Steam ID {steam_id} to player {player_name}!", ephemeral=True)
         
+        self.player_index.add(steam_id, player_name)
+        
         # Save stats and update message
         self.save_stats()
-        await self.update_stats_message()
+        self.update_stats_message()
 
 def setup(bot):
     bot.add_cog(PlaytimeTracker(bot))
\ No newline at end of file
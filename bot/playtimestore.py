@@ -0,0 +1,205 @@
+import asyncio
+import time
+import aiosqlite
+from util.config import PLAYTIME_DB, PLAYTIME_SESSION_GAP
+
+HOUR = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playtime_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id TEXT NOT NULL,
+    player_name TEXT NOT NULL,
+    started INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    ended INTEGER
+);
+CREATE TABLE IF NOT EXISTS playtime_hourly (
+    player_id TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    seconds INTEGER DEFAULT 0,
+    PRIMARY KEY (player_id, hour)
+);
+CREATE TABLE IF NOT EXISTS playtime_daily (
+    player_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    seconds INTEGER DEFAULT 0,
+    PRIMARY KEY (player_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_playtime_sessions_player ON playtime_sessions (player_id, started);
+CREATE INDEX IF NOT EXISTS idx_playtime_sessions_open ON playtime_sessions (ended) WHERE ended IS NULL;
+CREATE INDEX IF NOT EXISTS idx_playtime_hourly_hour ON playtime_hourly (hour);
+CREATE INDEX IF NOT EXISTS idx_playtime_daily_day ON playtime_daily (day);
+"""
+
+UPSERT_HOURLY = """
+INSERT INTO playtime_hourly (player_id, hour, seconds) VALUES (?, ?, ?)
+ON CONFLICT (player_id, hour) DO UPDATE SET seconds = seconds + excluded.seconds
+"""
+UPSERT_DAILY = """
+INSERT INTO playtime_daily (player_id, day, seconds) VALUES (?, ?, ?)
+ON CONFLICT (player_id, day) DO UPDATE SET seconds = seconds + excluded.seconds
+"""
+
+def local_day(timestamp):
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+def split_hours(start, end):
+    """Rozdělí interval [start, end) na [(začátek hodiny, sekundy)]"""
+    buckets = []
+    while start < end:
+        hour = start - start % HOUR
+        stop = min(end, hour + HOUR)
+        buckets.append((hour, stop - start))
+        start = stop
+    return buckets
+
+class PlaytimeStore:
+    """
+    Odehraný čas jako relace (připojení/odpojení) odvozené ze snímků přítomnosti na serveru.
+    Každý snímek připíše uplynulý čas otevřených relací do hodinových a denních součtů,
+    takže žebříčky za období i rozpis po dnech v týdnu se čtou z hotových součtů, ne z relací.
+    """
+    def __init__(self, path=PLAYTIME_DB, session_gap=PLAYTIME_SESSION_GAP):
+        self.path = path
+        self.session_gap = session_gap
+        self.db = None
+        self.open_lock = asyncio.Lock()
+        self.lock = asyncio.Lock()
+        # player_id -> (id relace, do kdy je čas započtený)
+        self.open_sessions = {}
+        self.last_snapshot = None
+
+    async def connection(self):
+        async with self.open_lock:
+            if self.db is None:
+                db = await aiosqlite.connect(self.path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.executescript(SCHEMA)
+                # Relace otevřené při pádu nebo vypnutí bota končí posledním snímkem, kdy byl hráč vidět
+                await db.execute("UPDATE playtime_sessions SET ended = last_seen WHERE ended IS NULL")
+                await db.commit()
+                self.db = db
+        return self.db
+
+    async def _accrue(self, db, player_id, start, end):
+        buckets = split_hours(start, end)
+        await db.executemany(UPSERT_HOURLY, [(player_id, hour, seconds) for hour, seconds in buckets])
+        await db.executemany(UPSERT_DAILY, [(player_id, local_day(hour), seconds) for hour, seconds in buckets])
+
+    async def record_snapshot(self, present, now=None):
+        """
+        Zpracuje snímek {player_id: jméno} hráčů online v čase now.
+        Relace začíná prvním snímkem s hráčem a končí prvním snímkem bez něj. Když od minulého
+        snímku uběhlo víc než session_gap (výpadek RCON, restart), relace se uzavřou posledním
+        snímkem a mezera se nezapočítá. Vrací {player_id: nově připsané sekundy}.
+        """
+        now = int(now if now is not None else time.time())
+        db = await self.connection()
+        async with self.lock:
+            gap = self.last_snapshot is not None and now - self.last_snapshot > self.session_gap
+            added = {}
+            try:
+                for player_id, (session_id, last_seen) in list(self.open_sessions.items()):
+                    if gap or player_id not in present:
+                        end = last_seen if gap else now
+                        await db.execute(
+                            "UPDATE playtime_sessions SET last_seen = ?, ended = ? WHERE id = ?", (end, end, session_id)
+                        )
+                        del self.open_sessions[player_id]
+                    else:
+                        end = now
+                        await db.execute("UPDATE playtime_sessions SET last_seen = ? WHERE id = ?", (end, session_id))
+                        self.open_sessions[player_id] = (session_id, end)
+                    if end > last_seen:
+                        await self._accrue(db, player_id, last_seen, end)
+                        added[player_id] = end - last_seen
+                for player_id, player_name in present.items():
+                    if player_id not in self.open_sessions:
+                        cursor = await db.execute(
+                            "INSERT INTO playtime_sessions (player_id, player_name, started, last_seen) VALUES (?, ?, ?, ?)",
+                            (player_id, player_name, now, now)
+                        )
+                        self.open_sessions[player_id] = (cursor.lastrowid, now)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            self.last_snapshot = now
+            return added
+
+    def first_day(self, days, now=None):
+        """Místní datum prvního dne období days dní včetně dneška"""
+        now = now if now is not None else time.time()
+        return local_day(now - (days - 1) * 86400)
+
+    async def top_days(self, days, limit=10):
+        """[(player_id, sekundy)] nejaktivnějších hráčů za posledních days dní (z denních součtů)"""
+        db = await self.connection()
+        async with db.execute(
+            "SELECT player_id, SUM(seconds) AS total FROM playtime_daily WHERE day >= ? "
+            "GROUP BY player_id ORDER BY total DESC LIMIT ?",
+            (self.first_day(days), limit)
+        ) as cursor:
+            return await cursor.fetchall()
+
+    async def player_days(self, player_id, days):
+        """Sekundy odehrané hráčem za posledních days dní"""
+        db = await self.connection()
+        async with db.execute(
+            "SELECT COALESCE(SUM(seconds), 0) FROM playtime_daily WHERE player_id = ? AND day >= ?",
+            (player_id, self.first_day(days))
+        ) as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def weekday_seconds(self, player_id):
+        """{den v týdnu (0 = pondělí): sekundy} za celou historii hráče"""
+        db = await self.connection()
+        async with db.execute(
+            "SELECT (CAST(strftime('%w', day) AS INTEGER) + 6) % 7, SUM(seconds) "
+            "FROM playtime_daily WHERE player_id = ? GROUP BY 1",
+            (player_id,)
+        ) as cursor:
+            return {weekday: seconds for weekday, seconds in await cursor.fetchall()}
+
+    async def rename_player(self, old_id, new_id):
+        """Převede relace a součty z dočasného ID na Steam ID (po /linksteam)"""
+        db = await self.connection()
+        async with self.lock:
+            try:
+                await db.execute("UPDATE playtime_sessions SET player_id = ? WHERE player_id = ?", (new_id, old_id))
+                await db.execute(
+                    "INSERT INTO playtime_hourly (player_id, hour, seconds) "
+                    "SELECT ?, hour, seconds FROM playtime_hourly WHERE player_id = ? "
+                    "ON CONFLICT (player_id, hour) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    (new_id, old_id)
+                )
+                await db.execute(
+                    "INSERT INTO playtime_daily (player_id, day, seconds) "
+                    "SELECT ?, day, seconds FROM playtime_daily WHERE player_id = ? "
+                    "ON CONFLICT (player_id, day) DO UPDATE SET seconds = seconds + excluded.seconds",
+                    (new_id, old_id)
+                )
+                await db.execute("DELETE FROM playtime_hourly WHERE player_id = ?", (old_id,))
+                await db.execute("DELETE FROM playtime_daily WHERE player_id = ?", (old_id,))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+            if old_id in self.open_sessions:
+                self.open_sessions[new_id] = self.open_sessions.pop(old_id)
+
+    async def reset(self):
+        db = await self.connection()
+        async with self.lock:
+            await db.execute("DELETE FROM playtime_sessions")
+            await db.execute("DELETE FROM playtime_hourly")
+            await db.execute("DELETE FROM playtime_daily")
+            await db.commit()
+            self.open_sessions = {}
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from util.config import RCON_HOST, RCON_PORT, RCON_PASS, RCON_TIMEOUT, RCON_QUIET_GAP, RCON_BACKOFF_MAX
+from util.config import RCON_CONNECTIONS
+
+AUTH_PREFIX = b'\x01'
+# Evrima ukončuje zprávy (heslo, příkaz i odpověď) nulovým bajtem
+TERMINATOR = b'\x00'
+READ_SIZE = 65536
+
+PLAYERLIST_COMMAND = b'\x02' + b'\x40' + b'\x00'
+PLAYERINFO_COMMAND = b'\x02' + b'\x77' + b'\x00'
+SERVERDETAILS_COMMAND = b'\x02' + b'\x12' + b'\x00'
+# Příkazy jen pro čtení, stejné čekající dotazy se slučují do jednoho
+READ_COMMANDS = {PLAYERLIST_COMMAND, PLAYERINFO_COMMAND, SERVERDETAILS_COMMAND}
+
+# Třídy priority: admin akce (oznámení, kick) před dotazy uživatelů před pravidelným pollingem
+PRIORITY_ADMIN = 0
+PRIORITY_LOOKUP = 1
+PRIORITY_POLL = 2
+# Kolik příkazů dané třídy smí být najednou rozpracováno
+CLASS_BUDGETS = {PRIORITY_ADMIN: RCON_CONNECTIONS, PRIORITY_LOOKUP: 1, PRIORITY_POLL: 1}
+
+# (host, port) serverů, které odpovědi neukončují nulovým bajtem; s nimi se pro každý
+# příkaz otevře nové spojení (jako dřívější klient gamercon_async)
+_unterminated_hosts = set()
+
+class RconConnection:
+    """Jedno přihlášené RCON spojení, příkazy na něm běží jeden po druhém"""
+    def __init__(self, host, port, password, timeout=RCON_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        # False, když poslední odpověď skončila bez ukončovacího bajtu (mohl zůstat nedočtený zbytek)
+        self.terminated = True
+
+    def is_connected(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    @property
+    def unterminated(self):
+        return (self.host, self.port) in _unterminated_hosts
+
+    async def connect(self):
+        await self.close()
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+        )
+        self.writer.write(AUTH_PREFIX + self.password.encode() + TERMINATOR)
+        await self.writer.drain()
+        if self.unterminated:
+            # Na heslo server posílá jedinou krátkou zprávu, stačí jedno čtení bez čekání na ticho
+            response = await asyncio.wait_for(self.reader.read(READ_SIZE), timeout=self.timeout)
+        else:
+            response = await self.read_response()
+        if b"Accepted" not in response:
+            raise ConnectionError(f"RCON authentication failed: {response[:100]!r}")
+        logging.info(f"RCON connected to {self.host}:{self.port}")
+
+    async def execute(self, command):
+        try:
+            self.writer.write(command)
+            await self.writer.drain()
+            response = await self.read_response()
+            if not self.terminated:
+                # Zbytek odpovědi může ještě dorazit a patřil by dalšímu příkazu, další začne na novém spojení
+                await self.close()
+            return response.decode('utf-8', errors='ignore')
+        except Exception:
+            # Rozpadlé nebo nedočtené spojení by posunulo odpovědi dalších příkazů
+            await self.close()
+            raise
+
+    async def read_response(self):
+        """
+        Čte do ukončovacího nulového bajtu. Když server zprávu neukončí, odpověď končí
+        po RCON_QUIET_GAP sekundách bez dalších dat; pak je terminated False, execute spojení
+        zavře a server se označí jako neukončující (další příkazy jdou vždy přes nové spojení).
+        """
+        self.terminated = True
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.timeout
+        data = bytearray()
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError("RCON response timeout")
+            try:
+                chunk = await asyncio.wait_for(
+                    self.reader.read(READ_SIZE), timeout=min(RCON_QUIET_GAP, remaining) if data else remaining
+                )
+            except asyncio.TimeoutError:
+                if data:
+                    self.terminated = False
+                    if not self.unterminated:
+                        _unterminated_hosts.add((self.host, self.port))
+                        logging.warning(
+                            f"RCON server {self.host}:{self.port} does not terminate responses, ending them after "
+                            f"{RCON_QUIET_GAP}s of silence and reconnecting for every command"
+                        )
+                    return bytes(data)
+                raise
+            if not chunk:
+                raise ConnectionError("RCON connection closed by server")
+            end = chunk.find(TERMINATOR)
+            if end >= 0:
+                data += chunk[:end]
+                return bytes(data)
+            data += chunk
+
+    async def close(self):
+        writer, self.reader, self.writer = self.writer, None, None
+        if writer is not None:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+class PendingCommand:
+    __slots__ = ("command", "priority", "future", "waiters")
+
+    def __init__(self, command, priority, future):
+        self.command = command
+        self.priority = priority
+        self.future = future
+        # Kolik volajících na odpověď ještě čeká (u sloučených dotazů víc než jeden)
+        self.waiters = 0
+
+class RconClient:
+    """
+    Plánovač RCON příkazů nad několika trvalými spojeními na Evrima server.
+    Čekající příkazy se berou podle třídy priority, každá třída má limit rozpracovaných příkazů
+    a polling nikdy neobsadí všechna spojení, takže admin příkaz nečeká za velkou odpovědí playerinfo.
+    Stejné čekající dotazy jen pro čtení se sloučí a všichni volající dostanou jednu odpověď.
+    Po výpadku se spojení obnoví s exponenciálním backoffem a jitterem.
+    """
+    def __init__(self, host, port, password, timeout=RCON_TIMEOUT, backoff_max=RCON_BACKOFF_MAX,
+                 connections=RCON_CONNECTIONS, budgets=None):
+        self.timeout = timeout
+        self.backoff_base = 1
+        self.backoff_max = backoff_max
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.connections = [RconConnection(host, port, password, timeout) for _ in range(max(1, connections))]
+        self.budgets = dict(budgets or CLASS_BUDGETS)
+        self.pending = {priority: deque() for priority in self.budgets}
+        self.in_flight = {priority: 0 for priority in self.budgets}
+        # příkaz -> čekající PendingCommand, pro slučování dotazů jen pro čtení
+        self.pending_reads = {}
+        self.changed = asyncio.Event()
+        self.workers = []
+
+    async def send_command(self, command, priority=PRIORITY_LOOKUP, timeout=None):
+        """Pošle binární příkaz (b'\\x02' + kód + data + b'\\x00') a vrátí text odpovědi"""
+        entry = self.pending_reads.get(command) if command in READ_COMMANDS else None
+        if entry is None or entry.future.done():
+            entry = PendingCommand(command, priority, asyncio.get_event_loop().create_future())
+            self.pending[priority].append(entry)
+            if command in READ_COMMANDS:
+                self.pending_reads[command] = entry
+        elif priority < entry.priority:
+            # Sloučený dotaz přebírá vyšší prioritu nového volajícího
+            self.pending[entry.priority].remove(entry)
+            self.pending[priority].append(entry)
+            entry.priority = priority
+        self.start_workers()
+        self.changed.set()
+        entry.waiters += 1
+        try:
+            # shield: timeout jednoho volajícího nesmí zrušit odpověď ostatním u sloučeného dotazu
+            return await asyncio.wait_for(asyncio.shield(entry.future), timeout or self.timeout * 2)
+        finally:
+            entry.waiters -= 1
+            if not entry.waiters and not entry.future.done():
+                # Poslední volající to vzdal: příkaz, který ještě čeká ve frontě, se už neodešle
+                entry.future.cancel()
+
+    def start_workers(self):
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        for connection in self.connections[len(self.workers):]:
+            self.workers.append(asyncio.ensure_future(self.process_queue(connection)))
+
+    def _eligible(self, priority):
+        if self.in_flight[priority] >= self.budgets[priority]:
+            return False
+        if priority == PRIORITY_ADMIN:
+            return True
+        # Jedno spojení zůstává volné pro admin příkazy
+        background = sum(count for p, count in self.in_flight.items() if p != PRIORITY_ADMIN)
+        return background < max(1, len(self.connections) - 1)
+
+    def next_command(self):
+        for priority in sorted(self.pending):
+            queue = self.pending[priority]
+            # Volající, kteří to mezitím vzdali (timeout), se přeskočí
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if queue and self._eligible(priority):
+                entry = queue.popleft()
+                if self.pending_reads.get(entry.command) is entry:
+                    del self.pending_reads[entry.command]
+                return entry
+        return None
+
+    async def process_queue(self, connection):
+        while True:
+            entry = self.next_command()
+            if entry is None:
+                self.changed.clear()
+                await self.changed.wait()
+                continue
+            self.in_flight[entry.priority] += 1
+            try:
+                response = await self.execute(connection, entry.command)
+            except Exception as e:
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+                    # Chybu mohou zpracovat jen někteří volající, ostatní by hlásili "never retrieved"
+                    entry.future.exception()
+            else:
+                if not entry.future.done():
+                    entry.future.set_result(response)
+            finally:
+                self.in_flight[entry.priority] -= 1
+                self.changed.set()
+
+    async def execute(self, connection, command):
+        if not connection.is_connected():
+            now = time.monotonic()
+            if now < self.next_attempt:
+                raise ConnectionError(f"RCON reconnect postponed for {self.next_attempt - now:.1f}s")
+            try:
+                await connection.connect()
+            except Exception:
+                self.failures += 1
+                self.next_attempt = now + self._backoff_delay()
+                await connection.close()
+                raise
+            self.failures = 0
+        return await connection.execute(command)
+
+    def _backoff_delay(self):
+        # Full jitter: náhodně v intervalu <0, min(max, base * 2^n)>
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** self.failures)))
+
+    async def close(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+        for connection in self.connections:
+            await connection.close()
+
+_clients = {}
+
+def get_rcon_client(host=RCON_HOST, port=RCON_PORT, password=RCON_PASS):
+    """Vrátí sdílený RconClient pro daný server"""
+    key = (host, port)
+    if key not in _clients:
+        _clients[key] = RconClient(host, port, password)
+    return _clients[key]
@@ -0,0 +1,173 @@
+import logging
+import re
+from typing import NamedTuple, Optional
+
+STEAM_ID_PATTERN = re.compile(r'\d{16,20}')
+EOS_ID_PATTERN = re.compile(r'[0-9a-fA-F]{32,}')
+# Popisky, které některé verze serveru dávají před hodnoty ("Steam64ID: 7656...")
+LABELS = r'(?:steam64id|steamid|steam_id|eosid|eos_id|eos|name|playername|playerdataname)'
+LABEL_PATTERN = re.compile(r'^' + LABELS + r'\s*:\s*', re.IGNORECASE)
+# Oddělovače položek: čárky, konce řádků a začátek každé hodnoty s popiskem
+SEPARATOR_PATTERN = re.compile(r'[,\r\n]+|(?=\b' + LABELS + r'\s*:)', re.IGNORECASE)
+
+class PlayerListEntry(NamedTuple):
+    # None, když se jména v odpovědi nedala spolehlivě spárovat se Steam ID
+    name: Optional[str]
+    steam_id: Optional[str]
+    eos_id: Optional[str]
+
+def decode_response(response):
+    if isinstance(response, bytes):
+        return response.decode('utf-8', errors='ignore')
+    return str(response)
+
+def parse_player_list(response):
+    """
+    Rozparsuje odpověď RCON playerlist na [PlayerListEntry(name, steam_id, eos_id)].
+    Položky jsou oddělené čárkami a řádky; server je posílá buď po hráčích, nebo po sloupcích
+    (všechna jména, pak všechna ID). V obou případech platí, že n-té jméno patří k n-tému
+    Steam ID a n-tému EOS ID, proto se párují podle pořadí v rámci svého typu.
+    Když počet jmen nesedí s počtem Steam ID, vrátí hráče jen se Steam ID a name=None.
+    """
+    if not response:
+        return []
+    text = decode_response(response).strip()
+    if text.lower().startswith('playerlist'):
+        text = text[10:]
+
+    names, steam_ids, eos_ids = [], [], []
+    for part in SEPARATOR_PATTERN.split(text):
+        part = LABEL_PATTERN.sub('', part.strip())
+        if not part:
+            continue
+        if STEAM_ID_PATTERN.fullmatch(part):
+            steam_ids.append(part)
+        elif EOS_ID_PATTERN.fullmatch(part):
+            eos_ids.append(part.lower())
+        elif not part.isdigit():
+            names.append(part)
+
+    if steam_ids and len(names) != len(steam_ids):
+        # Jméno obsahující čárku ("Bob, Jr") by posunulo párování a přiřadilo jména cizím ID,
+        # proto se v takovém snímku jména zahodí a hráči zůstanou jen pod Steam ID
+        logging.warning(f"Player list has {len(names)} names but {len(steam_ids)} Steam IDs, names ignored")
+        names = [None] * len(steam_ids)
+    count = max(len(names), len(steam_ids))
+    entries = []
+    for i in range(count):
+        steam_id = steam_ids[i] if i < len(steam_ids) else None
+        # EOS ID jen tehdy, když jich přišlo stejně jako hráčů, jinak by se mohla přiřadit špatně
+        eos_id = eos_ids[i] if len(eos_ids) == count else None
+        entries.append(PlayerListEntry(names[i], steam_id, eos_id))
+    return entries
+
+class PlayerInfo(NamedTuple):
+    id: str
+    name: str
+    dino: str
+    x: float
+    y: float
+    z: float
+    growth: float
+    health: float
+    stamina: float
+    hunger: float
+    thirst: float
+
+    @property
+    def coords_text(self):
+        return f"{self.y:,.3f}, {self.x:,.3f}, {self.z:,.3f}"
+
+# "Klíč: hodnota" až do čárky nebo konce řádku, jeden průchod celou odpovědí;
+# čárka, za kterou následuje "Y=" nebo "Z=", hodnotu neukončí ("Location: X=1, Y=2, Z=3")
+TOKEN_PATTERN = re.compile(r'(\w+):[ \t]*([^,\r\n]*(?:,[ \t]*[YZ]=[^,\r\n]*)*)')
+# Klíč playerinfo -> pole záznamu; u aliasů (jen lenient) vyhrává hlavní klíč
+FIELDS = {
+    'PlayerID': 'id', 'PlayerDataName': 'name', 'Name': 'name', 'Location': 'location', 'Class': 'dino',
+    'Growth': 'growth', 'Health': 'health', 'Stamina': 'stamina', 'Hunger': 'hunger', 'Thirst': 'thirst',
+}
+ALIASES = {'CharacterName': 'name', 'Position': 'location', 'Dinosaur': 'dino', 'SteamID': 'id', 'Steam64ID': 'id'}
+STATS = ('growth', 'health', 'stamina', 'hunger', 'thirst')
+_unknown_keys = set()
+
+class PlayerInfoFormatError(ValueError):
+    pass
+
+def _location(value):
+    """"X=1.0 Y=-2.5 Z=3" nebo "X=1.0, Y=-2.5, Z=3" -> (x, y, z)"""
+    coords = {}
+    for part in value.replace(',', ' ').replace('= ', '=').split():
+        axis, _, number = part.partition('=')
+        if number:
+            coords[axis.upper()] = float(number)
+    return coords['X'], coords['Y'], coords['Z']
+
+def _build_player_info(fields, strict):
+    if 'id' not in fields or 'location' not in fields:
+        raise PlayerInfoFormatError(f"Player record without {'PlayerID' if 'id' not in fields else 'Location'}: {fields}")
+    x, y, z = _location(fields['location'])
+    stats = []
+    for stat in STATS:
+        value = fields.get(stat)
+        if value is None:
+            if strict:
+                raise PlayerInfoFormatError(f"Player {fields['id']} is missing {stat}")
+            stats.append(100.0)
+        else:
+            stats.append(float(value) * 100)
+    dino = fields.get('dino', 'Unknown')
+    if dino.startswith('BP_'):
+        dino = dino[3:]
+    if dino.endswith('_C'):
+        dino = dino[:-2]
+    return PlayerInfo(fields['id'], fields.get('name') or "Neznámý hráč", dino, x, y, z, *stats)
+
+def parse_player_info(response, steam_ids=None, strict=False):
+    """
+    Rozparsuje odpověď RCON playerinfo jedním průchodem na {steam_id: PlayerInfo}.
+    Nový hráč začíná, když se v odpovědi zopakuje klíč, který už aktuální záznam má,
+    takže nezáleží na pořadí polí (jméno před PlayerID i za ním).
+    strict: neznámé klíče, chybějící hodnoty a nečitelná čísla vyhodí PlayerInfoFormatError.
+    lenient (výchozí): přijme aliasy starších verzí serveru, neznámé klíče jednou zaloguje
+    a vadné záznamy přeskočí. steam_ids volitelně omezí výsledek na dané hráče.
+    """
+    if not response:
+        return {}
+    text = decode_response(response)
+    wanted = set(steam_ids) if steam_ids is not None else None
+    players = {}
+    records = []
+    fields, keys = {}, set()
+    for key, value in TOKEN_PATTERN.findall(text):
+        field = FIELDS.get(key)
+        primary = field is not None
+        if field is None:
+            field = None if strict else ALIASES.get(key)
+            if field is None:
+                if strict and key != 'PlayerInfo':
+                    raise PlayerInfoFormatError(f"Unknown playerinfo key {key!r}")
+                if key not in _unknown_keys and key != 'PlayerInfo':
+                    _unknown_keys.add(key)
+                    logging.warning(f"Unknown playerinfo key {key!r} ignored")
+                continue
+        if key in keys:
+            records.append(fields)
+            fields, keys = {}, set()
+        keys.add(key)
+        value = value.strip()
+        if primary or field not in fields:
+            fields[field] = value
+    if fields:
+        records.append(fields)
+
+    for fields in records:
+        try:
+            player = _build_player_info(fields, strict)
+        except (PlayerInfoFormatError, ValueError, KeyError) as e:
+            if strict:
+                raise PlayerInfoFormatError(f"Invalid playerinfo record {fields}: {e!r}") from e
+            logging.warning(f"Skipping playerinfo record {fields.get('id', '?')}: {e!r}")
+            continue
+        if wanted is None or player.id in wanted:
+            players[player.id] = player
+    return players
@@ -0,0 +1,142 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+from nextcord.ext import tasks
+from util.config import RCON_SNAPSHOT_INTERVAL
+from util.rcon import get_rcon_client, PLAYERLIST_COMMAND, PLAYERINFO_COMMAND, PRIORITY_LOOKUP, PRIORITY_POLL
+from util.rconparse import parse_player_list, parse_player_info
+
+@dataclass(frozen=True)
+class RconSnapshot:
+    version: int
+    taken: float
+    players: tuple
+    # {steam_id: PlayerInfo} jen pro čtení, aby si ho cogy nemohly navzájem měnit
+    player_info: Mapping
+    playerlist_raw: Optional[str] = None
+
+    @property
+    def age(self):
+        return time.time() - self.taken
+
+    def is_online(self, steam_id):
+        return any(player.steam_id == steam_id for player in self.players)
+
+    def info(self, steam_id):
+        """Data z playerinfo pro daného hráče, None pokud není online"""
+        return self.player_info.get(steam_id)
+
+class RconSnapshots:
+    """
+    Jediný zdroj stavu serveru z RCON pro všechny cogy.
+    Jednou za interval se přes jedno spojení pošle playerlist a playerinfo a výsledek se zveřejní
+    jako neměnný snímek s rostoucí verzí. Odběratelé dostanou každý nový snímek, příkazy na požádání
+    berou poslední snímek, nebo se připojí k právě běžícímu obnovení místo vlastního dotazu.
+    """
+    def __init__(self, bot, interval=RCON_SNAPSHOT_INTERVAL):
+        self.bot = bot
+        self.interval = interval
+        self.snapshot = None
+        self.version = 0
+        self.subscribers = []
+        self.refresh_task = None
+        self.refresh_priority = None
+        # Kdy začal dotaz, ze kterého je aktuální snímek (pořadí souběžných obnovení)
+        self.snapshot_started = 0.0
+        self.publish_task = None
+        self.refresh_snapshots.change_interval(seconds=interval)
+
+    def subscribe(self, handler):
+        """Zaregistruje handler(snapshot) (může být async) volaný po každém novém snímku"""
+        self.subscribers.append(handler)
+        if not self.refresh_snapshots.is_running():
+            self.refresh_snapshots.start()
+
+    def unsubscribe(self, handler):
+        self.subscribers = [h for h in self.subscribers if h != handler]
+        if not self.subscribers and self.refresh_snapshots.is_running():
+            self.refresh_snapshots.cancel()
+
+    async def get(self, max_age=None, priority=PRIORITY_LOOKUP):
+        """Poslední snímek, pokud není starší než max_age (výchozí interval), jinak nový"""
+        max_age = self.interval if max_age is None else max_age
+        if self.snapshot is not None and self.snapshot.age <= max_age:
+            return self.snapshot
+        return await self.refresh(priority)
+
+    async def refresh(self, priority=PRIORITY_LOOKUP):
+        """
+        Obnoví snímek; souběžná volání čekají na stejný dotaz. Když běžící obnovení má nižší
+        prioritu (polling), spustí se nové s prioritou volajícího, aby dotaz uživatele nečekal
+        ve frontě pollingu (RconClient čekající stejné příkazy sloučí a povýší).
+        Při chybě vrátí poslední snímek.
+        """
+        if self.refresh_task is None or self.refresh_task.done() or priority < self.refresh_priority:
+            self.refresh_task = asyncio.ensure_future(self._refresh(priority))
+            self.refresh_priority = priority
+        return await asyncio.shield(self.refresh_task)
+
+    async def _refresh(self, priority):
+        started = time.time()
+        try:
+            playerlist, playerinfo = await self.fetch(priority)
+        except Exception as e:
+            logging.error(f"Error refreshing RCON snapshot: {e}")
+            return self.snapshot
+        if started < self.snapshot_started:
+            # Později spuštěné obnovení (s vyšší prioritou) už zveřejnilo novější data
+            return self.snapshot
+        self.snapshot_started = started
+        players = tuple(parse_player_list(playerlist))
+        steam_ids = [player.steam_id for player in players if player.steam_id]
+        player_info = MappingProxyType(parse_player_info(playerinfo, steam_ids))
+        self.version += 1
+        self.snapshot = RconSnapshot(
+            version=self.version, taken=time.time(), players=players,
+            player_info=player_info, playerlist_raw=playerlist
+        )
+        logging.info(f"RCON snapshot {self.version}: {len(players)} players online")
+        # Odběratelé (zápis playtime, editace embedů) běží mimo obnovení, volající na ně nečekají
+        self.publish_task = asyncio.ensure_future(self.publish(self.snapshot, self.publish_task))
+        return self.snapshot
+
+    async def fetch(self, priority=PRIORITY_LOOKUP):
+        """playerlist a (jsou-li hráči online) playerinfo přes sdílené RCON spojení"""
+        rcon = get_rcon_client()
+        playerlist = await rcon.send_command(PLAYERLIST_COMMAND, priority)
+        if not playerlist:
+            raise ConnectionError("Empty playerlist response")
+        playerinfo = None
+        if parse_player_list(playerlist):
+            playerinfo = await rcon.send_command(PLAYERINFO_COMMAND, priority)
+        return playerlist, playerinfo
+
+    async def publish(self, snapshot, previous=None):
+        # Odběratelé dostávají snímky popořadě, i když se předchozí ještě zpracovává
+        if previous is not None:
+            await asyncio.wait([previous])
+        for handler in list(self.subscribers):
+            try:
+                result = handler(snapshot)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logging.error(f"Error in RCON snapshot subscriber {getattr(handler, '__qualname__', handler)}: {e}")
+
+    @tasks.loop(seconds=RCON_SNAPSHOT_INTERVAL)
+    async def refresh_snapshots(self):
+        await self.refresh(PRIORITY_POLL)
+
+    @refresh_snapshots.before_loop
+    async def before_refresh_snapshots(self):
+        await self.bot.wait_until_ready()
+
+def get_rcon_snapshots(bot):
+    """Vrátí sdílenou instanci RconSnapshots pro daného bota"""
+    if not hasattr(bot, "rcon_snapshots"):
+        bot.rcon_snapshots = RconSnapshots(bot)
+    return bot.rcon_snapshots
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import paramiko
+from util.config import FTP_HOST, FTP_PASS, FTP_PORT, FTP_USER
+from util.config import SFTP_KEEPALIVE, SFTP_WINDOW_SIZE, SFTP_BACKOFF_MAX
+
+# Od této velikosti se čtení stahuje s prefetch (paralelní požadavky místo jednoho po druhém)
+PREFETCH_THRESHOLD = 256 * 1024
+MAX_PACKET_SIZE = 32768
+
+def _read_chunk(file, offset, length):
+    if length <= 0:
+        return b""
+    file.seek(offset)
+    if length >= PREFETCH_THRESHOLD:
+        file.prefetch(offset + length)
+    return file.read(length)
+
+class SFTPPool:
+    """
+    Dlouhodobé SFTP spojení sdílené všemi log cogy.
+    Udržuje se keepalive pakety, po výpadku se znovu připojí s exponenciálním backoffem a jitterem.
+    """
+    def __init__(self, host, port, username, password,
+                 keepalive=SFTP_KEEPALIVE, window_size=SFTP_WINDOW_SIZE, backoff_max=SFTP_BACKOFF_MAX):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.keepalive = keepalive
+        self.window_size = window_size
+        self.backoff_base = 1
+        self.backoff_max = backoff_max
+        self.transport = None
+        self.sftp = None
+        self.failures = 0
+        self.next_attempt = 0.0
+        # paramiko klient není určen pro souběžné použití, operace se řadí do jednoho vlákna
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sftp")
+
+    def is_connected(self):
+        return self.sftp is not None and self.transport is not None and self.transport.is_active()
+
+    def _connect(self):
+        self._close()
+        transport = paramiko.Transport(
+            (self.host, self.port),
+            default_window_size=self.window_size,
+            default_max_packet_size=MAX_PACKET_SIZE
+        )
+        try:
+            transport.connect(username=self.username, password=self.password)
+            transport.set_keepalive(self.keepalive)
+            self.sftp = paramiko.SFTPClient.from_transport(
+                transport, window_size=self.window_size, max_packet_size=MAX_PACKET_SIZE
+            )
+        except Exception:
+            transport.close()
+            raise
+        self.transport = transport
+        logging.info(f"SFTP connected to {self.host}:{self.port}")
+
+    def _close(self):
+        for closable in (self.sftp, self.transport):
+            if closable is not None:
+                try:
+                    closable.close()
+                except Exception:
+                    pass
+        self.sftp = None
+        self.transport = None
+
+    def _backoff_delay(self):
+        # Full jitter: náhodně v intervalu <0, min(max, base * 2^n)>
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** self.failures)))
+
+    def _call(self, operation, *args, **kwargs):
+        if not self.is_connected():
+            now = time.monotonic()
+            if now < self.next_attempt:
+                raise ConnectionError(f"SFTP reconnect postponed for {self.next_attempt - now:.1f}s")
+            try:
+                self._connect()
+            except Exception:
+                self.failures += 1
+                self.next_attempt = now + self._backoff_delay()
+                self._close()
+                raise
+            self.failures = 0
+        try:
+            return operation(self.sftp, *args, **kwargs)
+        except Exception:
+            # Spojení spadlo uprostřed operace, další volání se připojí znovu
+            if not self.is_connected():
+                self._close()
+            raise
+
+    async def run(self, operation, *args, **kwargs):
+        """Spustí operation(sftp, *args) nad sdíleným spojením mimo event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, lambda: self._call(operation, *args, **kwargs))
+
+    async def stat(self, path):
+        return await self.run(lambda sftp: sftp.stat(path))
+
+    async def read_range(self, path, offset, length):
+        """Přečte length bajtů od offsetu, velká čtení s prefetch"""
+        return (await self.read_ranges(path, [(offset, length)]))[0]
+
+    async def read_ranges(self, path, ranges):
+        """Přečte více rozsahů (offset, length) během jednoho otevření souboru"""
+        def _read(sftp):
+            with sftp.open(path, "rb") as file:
+                return [_read_chunk(file, offset, length) for offset, length in ranges]
+        return await self.run(_read)
+
+    def close(self):
+        self.executor.submit(self._close)
+
+_pools = {}
+
+def get_sftp_pool(host=FTP_HOST, port=FTP_PORT, username=FTP_USER, password=FTP_PASS):
+    """Vrátí sdílený SFTPPool pro daný server"""
+    key = (host, port, username)
+    if key not in _pools:
+        _pools[key] = SFTPPool(host, port, username, password)
+    return _pools[key]